@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+"""Benchmarks of N-queens solving algorithms"""
+
+import csv
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from itertools import product
+
+import chessboard
+import solver
+
+# Algorithms that can be measured, 'verbose' operates on the ChessBoard class and prints whole boards.
+ALGORITHMS = ('basic', 'bitboard', 'iterative', 'count', 'verbose')
+# Default matrix of the benchmark.
+DIMS = (4, 6, 8)
+REPEATS = 5
+WARMUP = 1
+# Multiprocessing variants measured for every choice of the --multi option.
+MODES = {'off': (False,), 'on': (True,), 'both': (False, True)}
+# Columns of the results table, in order.
+FIELDS = ('dim', 'queens', 'algorithm', 'multi', 'workers', 'repeats', 'solutions', 'nodes',
+          'median', 'p95', 'min', 'nodes_per_second')
+
+def tree_size(queens: list) -> int :
+    """ Returns number of nodes of the search tree, starting arrangement included.
+    Nodes are arrangements with leftmost empty columns filled without conflicts,
+    the order every algorithm fills the board in, so rates of all of them are comparable. """
+    dim = len(queens)
+    full = (1 << dim) - 1
+    empty = [c for c, q in enumerate(queens) if q is None]
+    if not all(solver.valid(queens, c) for c in range(dim)) :
+        return 0
+
+    def size(i, rows, up, down) -> int :
+        if i == len(empty) :
+            return 1
+        c = empty[i]
+        free = ~(rows | (up >> (dim - 1 - c)) | (down >> c)) & full
+        total = 1
+        while free :
+            bit = free & -free
+            free ^= bit
+            total += size(i + 1, rows | bit, up | (bit << (dim - 1 - c)), down | (bit << c))
+        return total
+
+    return size(0, *solver.masks(queens))
+
+def percentile(times: list, p: float) -> float :
+    """ Returns the nearest-rank percentile of measured times. """
+    times = sorted(times)
+    return times[max(math.ceil(p / 100 * len(times)) - 1, 0)]
+
+def prepare(algorithm: str, multi: bool, queens: list, pool=None) :
+    """ Returns a callable running the algorithm the way the CLI does, printing included.
+    Building the chessboard is done here, so it is not measured. """
+    dim = len(queens)
+    if algorithm == 'verbose' :
+        board = chessboard.ChessBoard(dim, list(queens))
+        if multi :
+            return lambda: chessboard.multiverbose_solve(board, pool)
+        return lambda: chessboard.verbose_solve(board)
+    if algorithm == 'count' :
+        if multi :
+            return lambda: print(solver.multi_count(list(queens), pool=pool))
+        return lambda: print(solver.bitboard_count(list(queens)))
+    if multi :
+        return lambda: solver.multi_solve(list(queens), engine=algorithm, pool=pool)
+
+    def run() -> None :
+        for solution in solver.ENGINES[algorithm](list(queens)) :
+            print(list(solution))
+
+    return run
+
+def measure(run, repeats=REPEATS, warmup=WARMUP) -> list :
+    """ Calls 'run' with output discarded, returns wall times of the measured calls. """
+    times = []
+    with open(os.devnull, 'w') as null, redirect_stdout(null) :
+        for _ in range(warmup) :
+            run()
+        for _ in range(repeats) :
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+    return times
+
+def benchmark(dims, prefixes, algorithms, modes, repeats=REPEATS, warmup=WARMUP, pool=None) :
+    """ Runs every combination of the matrix, yields a row of results for each. """
+    for dim, prefix in product(dims, prefixes) :
+        queens = list(prefix)
+        try :
+            solver.input_check(dim, queens)
+        except ValueError as e :
+            print(f"Skipping dim={dim} queens={prefix}: {e}", file=sys.stderr)
+            continue
+        solutions = solver.bitboard_count(list(queens))
+        nodes = tree_size(queens)
+        for algorithm, multi in product(algorithms, modes) :
+            times = measure(prepare(algorithm, multi, queens, pool), repeats, warmup)
+            median = statistics.median(times)
+            yield {
+                'dim': dim,
+                'queens': ' '.join(str(q or 'N') for q in prefix),
+                'algorithm': algorithm,
+                'multi': multi,
+                'workers': solver.workers(pool) if multi else 1,
+                'repeats': repeats,
+                'solutions': solutions,
+                'nodes': nodes,
+                'median': median,
+                'p95': percentile(times, 95),
+                'min': min(times),
+                'nodes_per_second': nodes / median if median else None,
+                }
+
+def machine() -> dict :
+    """ Describes the environment, so runs across commits and machines can be compared. """
+    try :
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError) :
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+        'numpy': solver.np is not None,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        }
+
+def write_json(path: str, meta: dict, results: list) -> None :
+    """ Saves the environment and results as one JSON document. """
+    with open(path, 'w') as f :
+        json.dump({'machine': meta, 'results': results}, f, indent=2)
+
+def write_csv(path: str, meta: dict, results: list) -> None :
+    """ Saves results one per row, each with the commit and machine it was measured on,
+    so files of different runs can simply be concatenated. """
+    extra = ('commit', 'python', 'platform', 'cpus')
+    with open(path, 'w', newline='') as f :
+        writer = csv.DictWriter(f, fieldnames=FIELDS + extra)
+        writer.writeheader()
+        for row in results :
+            writer.writerow(row | {k: meta[k] for k in extra})
+
+if __name__ == '__main__' :
+    parser = ArgumentParser(
+            description="Measure N-queens solving algorithms across dimensions and initial arrangements.",
+            epilog="""
+        Example: benchmark.py -d 8 10 -q -q 1 -a basic bitboard --json results.json
+        measures both algorithms on an empty board and with a queen in bottom left corner.
+        """)
+    parser.add_argument('-d', '--dims', nargs='+', type=solver.dimension, default=DIMS,
+                        help="Chessboard's dimensions.")
+    parser.add_argument('-q', '--queens', nargs='*', type=solver.coordinate, action='append',
+                        help="""Initial arrangement in the format of solver.py, can be given many times.
+                        Empty board by default.""")
+    parser.add_argument('-a', '--algorithms', nargs='+', choices=ALGORITHMS, default=ALGORITHMS,
+                        help="""Algorithms to measure, 'count' only counts solutions with bitboards,
+                        'verbose' prints whole chessboards.""")
+    parser.add_argument('-m', '--multi', choices=MODES, default='both',
+                        help='Measure serial, multiprocess or both variants.')
+    parser.add_argument('-r', '--repeats', type=solver.limit, default=REPEATS, help='Measured runs of each case.')
+    parser.add_argument('-w', '--warmup', type=solver.limit, default=WARMUP,
+                        help='Runs of each case made before measuring.')
+    parser.add_argument('--json', metavar='FILE', help='Write results to a JSON file.')
+    parser.add_argument('--csv', metavar='FILE', help='Write results to a CSV file.')
+    args = parser.parse_args()
+    if args.repeats == 0 :
+        parser.error("--repeats must be positive")
+
+    meta = machine()
+    pool = solver.SolverPool() if args.multi != 'off' else None
+    results = []
+    print(f"{'dim':>4} {'queens':<16} {'algorithm':<10} {'multi':<6} {'median':>10} {'p95':>10} {'nodes/s':>12}")
+    try :
+        for row in benchmark(args.dims, args.queens or [[]], args.algorithms, MODES[args.multi],
+                             args.repeats, args.warmup, pool) :
+            results.append(row)
+            rate = f"{row['nodes_per_second']:.0f}" if row['nodes_per_second'] else '-'
+            print(f"{row['dim']:>4} {row['queens'] or '-':<16} {row['algorithm']:<10} {str(row['multi']):<6} "
+                  f"{row['median']:>10.6f} {row['p95']:>10.6f} {rate:>12}", flush=True)
+    finally :
+        if pool is not None :
+            pool.shutdown()
+        if args.json :
+            write_json(args.json, meta, results)
+        if args.csv :
+            write_csv(args.csv, meta, results)
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 """Qt6 graphic user interface for N-queens solver program"""
 
+import json
 import re
 import sys
 import os
@@ -133,6 +134,7 @@ class MainWindow(QMainWindow):
         self.solver.readyReadStandardOutput.connect(self.populate_solutions)
         self.solver.readyReadStandardError.connect(self.handle_stderr)
         self.solver.time = '?'
+        self.solver.errors = ''
         #make the window and show it
         self.ui_setup()
         self.show()
@@ -203,10 +205,11 @@ class MainWindow(QMainWindow):
         self.multi.setDisabled(True)
         #pass actual chessboard arrangement as commandline arguments
         M = ['-m'] if self.multi.isChecked() else []
-        self.solver.setArguments(M + ['-d', str(self.body.chess.dim), '-q'] + [str(q) if q else 'N' for q in self.body.chess.queens])
+        self.solver.setArguments(M + ['--cache', '--progress', '-d', str(self.body.chess.dim), '-q'] + [str(q) if q else 'N' for q in self.body.chess.queens])
         #give some feedback on what is being done
         if DEBUG: print(time.strftime('%x %X'), 'NOTICE: Starting solver process.', file=sys.stderr)
         self.statusbar.showMessage(self.tr("Computation in progress"))
+        self.solver.errors = ''
         #fire up the calculations
         self.solver.start()
 
@@ -246,16 +249,29 @@ class MainWindow(QMainWindow):
         self.body.update_state()
 
     def handle_stderr(self) -> None:
-        """ Print worker stderr output to terminal, remember running time. """
+        """ Show progress events in the status bar, print other worker stderr output to terminal,
+        remember running time. Incomplete last line is kept until the rest of it arrives. """
         regex = r'Elapsed time: (\d+.\d+e?-?\d*) seconds'
         data = self.solver.readAllStandardError()
-        text = bytes(data).decode("utf8")
-        try:
-            self.solver.time = float( re.search(regex, text).group(1) )
-        except Exception as e:
-            if DEBUG: print(time.strftime('%x %X'), "ERROR: Cannot read time -", file=sys.stderr)
-        else:
-            if DEBUG: print(text, file=sys.stderr)
+        *lines, self.solver.errors = (self.solver.errors + bytes(data).decode("utf8")).split('\n')
+        for line in lines:
+            if line.startswith('{'):
+                self.show_progress(json.loads(line))
+            elif match := re.search(regex, line):
+                self.solver.time = float(match.group(1))
+                if DEBUG: print(line, file=sys.stderr)
+            elif line and DEBUG:
+                print(time.strftime('%x %X'), "SOLVER:", line, file=sys.stderr)
+
+    def show_progress(self, event: dict) -> None:
+        """ Displays progress reported by the solver process in the status bar. """
+        if event['event'] != 'progress':
+            return
+        message = self.tr("Computation in progress: {}/{} parts done, {} solutions").format(
+            event['shards_done'], event['shards_total'], event['solutions'])
+        if event['eta'] is not None:
+            message += self.tr(", about {} seconds left").format(round(event['eta']))
+        self.statusbar.showMessage(message)
 
 
 if __name__ == '__main__':
@@ -1,8 +1,11 @@
 #!/usr/bin/env python
 """N-queens program logic and CLI"""
 
+import io
+import shutil
 import sys
-from concurrent.futures import ProcessPoolExecutor
+from collections.abc import Mapping
+from contextlib import redirect_stdout
 from copy import deepcopy
 
 from codetiming import Timer
@@ -17,9 +20,53 @@ class Terminal:
     RED = '\033[91m'
     ENDCOLOR = '\033[0m'
     CLEAR = '\033c'
+    MOVE = '\033[{};1H'
+    ERASE = '\033[J'
+    ERASELINE = '\033[K'
 
 ####################################
 # Section: chessboard implementation
+EMPTY, THREATENED, QUEEN = b'_+Q'
+
+class Fields(Mapping):
+    """ Dict-like view of chessboard's fields, maps (column, row) pairs counted from 1
+    to their states. States are stored as characters' codes in a bytearray
+    at index (column-1)*dim + (row-1), fields are iterated column by column. """
+    __slots__ = ('_cells', '_dim')
+
+    def __init__(self, cells: bytearray, dim: int):
+        self._cells = cells
+        self._dim = dim
+
+    def index(self, field) -> int:
+        """ Returns position of the field in the bytearray, raises KeyError if it is off the board. """
+        try:
+            col, row = field
+            if 1 <= col <= self._dim and 1 <= row <= self._dim:
+                return (col-1) * self._dim + row-1
+        except (TypeError, ValueError):
+            pass
+        raise KeyError(field)
+
+    def __getitem__(self, field) -> str:
+        return chr(self._cells[self.index(field)])
+
+    def __setitem__(self, field, state: str) -> None:
+        self._cells[self.index(field)] = ord(state)
+
+    def __contains__(self, field) -> bool:
+        try:
+            self.index(field)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return ((n, k) for n in range(1, self._dim+1) for k in range(1, self._dim+1))
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
 class ChessBoard:
     """ Class implements the N Queens problem.
 
@@ -27,14 +74,24 @@ class ChessBoard:
     'Q' - occupied,
     '+' - threatened,
     '_' - empty.
+    They are kept one byte per field in 'cells', 'board' is a dict-like view of it.
+    Numbers of queens attacking every row and diagonal are counted, a field
+    is threatened when any line through it is attacked or its column holds a queen.
+    Empty fields of every column are indexed in 'free' as bitmasks of rows counted from 0.
     Methods allow user to manually look for solutions
     by placing/removing queens on the chessboard
     or print result in human readable format. """
+    __slots__ = ('_dim', 'cells', 'board', 'queens', 'free', '_rows', '_ups', '_downs')
 
     def __init__(self, dim: int, queens=None):
         """ Gets chessboard's dimension and populates initial setup if one is given. """
         self._dim = solver.dimension(dim)
-        self.board = dict(((n, k), '_') for n in range(1, self.dim+1) for k in range(1, self.dim+1))
+        self.cells = bytearray([EMPTY]) * (self.dim * self.dim)
+        self.board = Fields(self.cells, self.dim)
+        self.free = [(1 << self.dim) - 1] * self.dim
+        self._rows = [0] * self.dim
+        self._ups = [0] * (2 * self.dim)
+        self._downs = [0] * (2 * self.dim)
         if queens is None:
             self.queens = [None] * self.dim
         elif solver.input_check(self.dim, queens):
@@ -54,33 +111,16 @@ class ChessBoard:
 
     def __str__(self) -> str:
         """ Use print() to view chessboard on the screen. """
-        # Upper line
-        result = Terminal.WHITE + '    '
-        for n in range(self.dim):
-            result += '_ '
-        result += '\n'
-        # Chessboard
-        for k in range(self.dim, 0, -1):
-            result += f'{k:>2} |'
-            for n in range(1, self.dim+1):
-                if self.board[n, k] == 'Q':
-                    result += Terminal.GREEN
-                elif self.board[n, k] == '+':
-                    result += Terminal.RED
-                result += self.board[n, k] + Terminal.WHITE + '|'
-            result += '\n'
-        # Column numeration
-        result += '    '
-        for n in range(1, self.dim+1):
-            result += f'{n:<2}'
-        result += '\n' + Terminal.ENDCOLOR
-        return result
+        return Renderer(self).frame()
 
     def clear(self) -> bool:
         """ Cleans the chessboard empty. """
-        for f in self.board:
-            self.board[f] = '_'
+        self.cells[:] = bytes([EMPTY]) * len(self.cells)
         self.queens = [None] * self.dim
+        self.free = [(1 << self.dim) - 1] * self.dim
+        self._rows = [0] * self.dim
+        self._ups = [0] * (2 * self.dim)
+        self._downs = [0] * (2 * self.dim)
         return True
 
     @staticmethod
@@ -95,49 +135,211 @@ class ChessBoard:
         return False
 
     def get_fields(self, col=None):
-        """ Returns empty fields up to given column, all empty fields by default. """
+        """ Yields empty fields up to given column, all empty fields by default.
+        Fields come column by column from the bottom row, read from the 'free' index. """
         if col is None:
             col = self.dim
-        return (f for f in self.board if f[0] <= col and self.board[f] == '_')
+        for n, free in enumerate(self.free[:col], start=1):
+            while free:
+                bit = free & -free
+                free ^= bit
+                yield (n, bit.bit_length())
+
+    def lines(self, col: int, row: int):
+        """ Yields positions in 'cells' of fields in the column, row and both diagonals
+        going through given field, counted from 0. The field itself comes up more than once. """
+        dim = self.dim
+        yield from range(col * dim, (col+1) * dim)
+        yield from range(row, dim * dim, dim)
+        for c in range(dim):
+            if 0 <= (r := row + c - col) < dim:
+                yield c * dim + r
+            if 0 <= (r := row - c + col) < dim:
+                yield c * dim + r
+
+    def threatened(self, col: int, row: int) -> bool:
+        """ Checks counters of lines going through given field, counted from 0. """
+        return (self.queens[col] is not None or self._rows[row] > 0
+                or self._ups[row - col + self.dim] > 0 or self._downs[row + col] > 0)
+
+    def attack(self, col: int, row: int, change: int) -> None:
+        """ Adds 'change' to counters of lines attacked by a queen on given field, counted from 0. """
+        self._rows[row] += change
+        self._ups[row - col + self.dim] += change
+        self._downs[row + col] += change
 
     def place_queen(self, field) -> bool:
-        """ Place or remove a queen from given field. Marks appropriate fields as threatened. """
+        """ Place or remove a queen from given field. Marks appropriate fields as threatened.
+        It takes time proportional to the dimension, only lines of the field are updated. """
         if field in self.board:
-            if self.board[field] == '_':
-                self.queens[field[0] - 1] = field[1]
-                self.board[field] = 'Q'
-                for f in self.board:
-                    if self.board[f] == '_' and self.field_check(f, field):
-                        self.board[f] = '+'
+            cells = self.cells
+            i = self.board.index(field)
+            col, row = field[0] - 1, field[1] - 1
+            dim, free = self.dim, self.free
+            if cells[i] == EMPTY:
+                self.queens[col] = field[1]
+                self.attack(col, row, 1)
+                for j in self.lines(col, row):
+                    if cells[j] == EMPTY:
+                        cells[j] = THREATENED
+                        free[j // dim] &= ~(1 << j % dim)
+                cells[i] = QUEEN
                 return True
-            if self.board[field] == 'Q':
-                self.queens[field[0] - 1] = None
-                self.board[field] = '_'
-                for f in self.board:
-                    if self.field_check(f, field):
-                        for h in enumerate(self.queens, start=1):
-                            if h[1] and self.field_check(f, h):
-                                break
-                        else:
-                            self.board[f] = '_'
+            if cells[i] == QUEEN:
+                self.queens[col] = None
+                self.attack(col, row, -1)
+                cells[i] = EMPTY
+                for j in self.lines(col, row):
+                    if cells[j] == QUEEN:
+                        continue
+                    if self.threatened(j // dim, j % dim):
+                        cells[j] = THREATENED
+                    else:
+                        cells[j] = EMPTY
+                        free[j // dim] |= 1 << j % dim
                 return True
             print(f'{Terminal.RED}Cannot place Queen here!{Terminal.ENDCOLOR}')
             return False
         print(f'{Terminal.RED}Incorrect field coordinates - out of range.{Terminal.ENDCOLOR}')
         return False
 
-    def solve(self):
-        """ Yields all possible solutions. """
+    def solve(self, stats=None):
+        """ Yields all possible solutions, the search is counted in 'stats' if they are given. """
+        if stats is not None:
+            depth = self.dim - self.queens.count(None)
         try:
             col = self.queens.index(None) + 1
         except ValueError:
+            if stats is not None:
+                stats.found(depth)
+                stats.pause()
             yield self
         else:
-            for f in self.get_fields(col):
+            fields = self.get_fields(col)
+            if stats is not None:
+                fields = list(fields)
+                stats.node(depth, self.dim - len(fields))
+            for f in fields:
                 self.place_queen(f)
-                yield from self.solve()
+                yield from self.solve(stats)
                 self.place_queen(f)
 
+# Drawn fields by their states, each is followed by a border.
+STYLES = {
+    QUEEN: Terminal.GREEN + 'Q' + Terminal.WHITE + '|',
+    THREATENED: Terminal.RED + '+' + Terminal.WHITE + '|',
+    EMPTY: '_' + Terminal.WHITE + '|',
+    }
+
+class Renderer:
+    """ Draws a chessboard or a window of it, 'width' columns by 'height' rows
+    with given bottom left field, the whole chessboard by default.
+    Rows are built only when their fields change, drawn ones are remembered,
+    so only changed lines of the screen are redrawn. """
+    __slots__ = ('chessboard', 'width', 'height', 'col', 'row', '_label', '_cache', '_screen')
+
+    def __init__(self, chessboard: ChessBoard, width=None, height=None, col=1, row=1):
+        self.chessboard = chessboard
+        self._label = max(2, len(str(chessboard.dim)))
+        self._cache = {}
+        self._screen = []
+        self.col, self.row = col, row
+        self.resize(width, height)
+
+    def resize(self, width=None, height=None) -> None:
+        """ Changes size of the window, keeps it inside the chessboard. """
+        dim = self.chessboard.dim
+        self.width = dim if width is None else max(0, min(width, dim))
+        self.height = dim if height is None else max(0, min(height, dim))
+        self.move(self.col, self.row)
+
+    def fit(self, columns: int, lines: int) -> None:
+        """ Sizes the window to fit given number of columns and lines of the terminal,
+        every field takes two characters, row numbers are put on the left. """
+        self.resize((columns - self._label - 2) // 2, lines - 2)
+
+    def move(self, col: int, row: int) -> None:
+        """ Moves bottom left corner of the window to given field, as far as the chessboard allows. """
+        dim = self.chessboard.dim
+        self.col = max(1, min(col, dim - self.width + 1))
+        self.row = max(1, min(row, dim - self.height + 1))
+
+    def follow(self, field) -> None:
+        """ Scrolls the window the least, so that given field is visible. """
+        col, row = field
+        if col < self.col:
+            self.col = col
+        elif col >= self.col + self.width:
+            self.col = col - self.width + 1
+        if row < self.row:
+            self.row = row
+        elif row >= self.row + self.height:
+            self.row = row - self.height + 1
+        self.move(self.col, self.row)
+
+    def line(self, k: int) -> str:
+        """ Returns k-th row of the window counted from 0 as drawn,
+        it is built again only if its fields differ from the last time. """
+        dim = self.chessboard.dim
+        start = self.row - 1 + k + (self.col - 1) * dim
+        fields = bytes(self.chessboard.cells[start:start + self.width * dim:dim])
+        cached = self._cache.get(self.row + k)
+        if cached is not None and cached[0] == fields:
+            return cached[1]
+        drawn = f'{self.row + k:>{self._label}} |' + ''.join([STYLES[f] for f in fields])
+        self._cache[self.row + k] = (fields, drawn)
+        return drawn
+
+    def lines(self) -> list:
+        """ Returns lines of the window from the top, column numeration included. """
+        margin = ' ' * (self._label + 2)
+        result = [margin + '_ ' * self.width]
+        result.extend(self.line(k) for k in range(self.height-1, -1, -1))
+        result.append(margin + self.numbers())
+        return result
+
+    def numbers(self) -> str:
+        """ Returns numeration of the window's columns aligned with their fields. A number
+        with its separating space may not fit into a field, then it also takes the following ones
+        and only every few columns, counted from the first one of the board, are numbered. """
+        step = len(str(self.chessboard.dim)) // 2 + 1
+        end = self.col + self.width
+        result = []
+        n = self.col
+        while n < end:
+            if (n - 1) % step == 0 and n + step <= end:
+                result.append(f'{n:<{2 * step}}')
+                n += step
+            else:
+                result.append('  ')
+                n += 1
+        return ''.join(result)
+
+    def frame(self) -> str:
+        """ Returns the whole window and remembers it as drawn on the screen. """
+        self._screen = self.lines()
+        return Terminal.WHITE + '\n'.join(self._screen) + '\n' + Terminal.ENDCOLOR
+
+    @property
+    def drawn(self) -> bool:
+        """ Tells if the window is known to be on the screen, as the last frame() left it. """
+        return bool(self._screen)
+
+    def forget(self) -> None:
+        """ Marks the window as no longer on the screen, e.g. after other output scrolled it away. """
+        self._screen = []
+
+    def redraw(self, top: int) -> str:
+        """ Returns escape sequences redrawing lines changed since the last drawing
+        of the window, which begins at given line of the screen counted from 1. """
+        lines = self.lines()
+        if len(lines) != len(self._screen):
+            self._screen = [''] * len(lines)
+        result = [Terminal.MOVE.format(top + i) + Terminal.WHITE + line + Terminal.ERASELINE
+                  for i, line in enumerate(lines) if line != self._screen[i]]
+        self._screen = lines
+        return ''.join(result) + Terminal.ENDCOLOR
+
 #############################
 # Section: solving algorithms
 def verbose_solve(chessboard: ChessBoard) -> None:
@@ -152,21 +354,43 @@ def verbose_solve(chessboard: ChessBoard) -> None:
             verbose_solve(chessboard)
             chessboard.place_queen(f)
 
-def multiverbose_solve(chessboard: ChessBoard) -> None:
-    """ Multiprocess wraper for verbose algorithm. """
+def verbose_collect(chessboard: ChessBoard) -> list:
+    """ Returns all solutions drawn as strings, used to ship results from worker processes. """
+    return [str(solution) for solution in chessboard.solve()]
+
+def multiverbose_solve(chessboard: ChessBoard, pool=None) -> None:
+    """ Multiprocess wraper for verbose algorithm.
+    Workers return drawn solutions, which are printed here in search order. """
     try:
         col = chessboard.queens.index(None) + 1
     except ValueError:
         print(chessboard)
     else:
-        with ProcessPoolExecutor() as executor:
-            for f in chessboard.get_fields(col):
-                chessboard.place_queen(f)
-                executor.submit(verbose_solve, deepcopy(chessboard))
-                chessboard.place_queen(f)
+        tasks = []
+        for f in chessboard.get_fields(col):
+            chessboard.place_queen(f)
+            tasks.append(deepcopy(chessboard))
+            chessboard.place_queen(f)
+        with solver.executor(pool) as executor:
+            for batch in executor.map(verbose_collect, tasks):
+                for solution in batch:
+                    print(solution)
 
 ##########################################
 # Section: interactive mode implementation
+# Help message printed below the header of the screen.
+HELP = (
+    "N - new chessboard",
+    "C - clear chessboard",
+    "x y - place/remove queen on field (x, y)",
+    "S - print solutions",
+    "m - toggle multiprocessing",
+    "v - toggle verbose output (slower)",
+    "E - exit program",
+    )
+# Lines of the screen below the chessboard kept for the prompt, user's input and messages.
+PROMPT_LINES = 8
+
 def get_command(x):
     """ Handles user input. """
     if (y := x.upper()) in ['N', 'C', 'S', 'V', 'M', 'E']:
@@ -183,51 +407,70 @@ def command_new() -> None:
             break
         except ValueError:
             print("Provide a non-negative integer!")
-    global myboard
+    global myboard, screen
     myboard = ChessBoard(dim)
+    screen = Renderer(myboard)
 
 def command_solve() -> None:
     """ Picks an algorithm and prints time. """
-    if verbose:
-        solve = multiverbose_solve if multi else verbose_solve
-        input_method = myboard
-    else:
-        solve = solver.multi_solve if multi else solver.basic_solve
-        input_method = myboard.queens
-
     with Timer(logger=lambda x: print(x, file=sys.stderr)):
-        solve( input_method )
+        if verbose and multi:
+            multiverbose_solve(myboard, pool)
+        elif verbose:
+            verbose_solve(myboard)
+        else:
+            for solution in solver.iter_solutions(myboard.dim, myboard.queens, multi=multi, pool=pool):
+                print(list(solution))
 
 def show() -> None:
-    """ Prints help message and current chessboard. """
+    """ Prints help message and current chessboard, only a window of it if it does not fit the terminal. """
+    size = shutil.get_terminal_size()
+    screen.fit(size.columns, size.lines - len(HELP) - 3 - PROMPT_LINES)
     print(Terminal.CLEAR, end='')
     print(f"{Terminal.DARKGREEN}############################################")
     print(f"#{Terminal.ENDCOLOR} multiprocess={multi}, verbose={verbose}")
     print(f"{Terminal.DARKGREEN}############################################{Terminal.ENDCOLOR}")
-    print("N - new chessboard")
-    print("C - clear chessboard")
-    print("x y - place/remove queen on field (x, y)")
-    print("S - print solutions")
-    print("m - toggle multiprocessing")
-    print("v - toggle verbose output (slower)")
-    print("E - exit program")
-    print(myboard)
+    print('\n'.join(HELP))
+    print(screen.frame())
+    print("Enter command:")
+
+def update(field=None) -> None:
+    """ Redraws changed rows of the chessboard shown by show(), scrolled to given field if needed,
+    and the prompt below it. The whole screen is printed again if the chessboard is not on it. """
+    if field is not None:
+        screen.follow(field)
+    if not screen.drawn:
+        show()
+        return
+    print(screen.redraw(len(HELP) + 4), end='')
+    prompt()
+
+def prompt(message='') -> None:
+    """ Prints the message and the prompt in place of the previous ones below the chessboard,
+    so that messages do not scroll the screen away from positions update() draws at. """
+    if screen.drawn:
+        print(Terminal.MOVE.format(len(HELP) + 4 + screen.height + 3) + Terminal.ERASE, end='')
+    print(message, end='')
     print("Enter command:")
 
 if __name__ == '__main__':
     verbose = False
     multi = False
     myboard = ChessBoard(0)
+    screen = Renderer(myboard)
+    # Worker processes are started once and reused by every multiprocess solve.
+    pool = solver.SolverPool()
     show()
     # The program's main loop.
     while True:
         try:
             command = get_command(input())
         except ValueError:
-            print("Command not recognized")
+            prompt("Command not recognized\n")
         else:
             match command:
                 case 'E':
+                    pool.shutdown()
                     break
                 case 'V':
                     verbose = not verbose
@@ -237,15 +480,19 @@ if __name__ == '__main__':
                     show()
                 case 'C':
                     myboard.clear()
-                    show()
+                    update()
                 case 'N':
                     command_new()
                     show()
                 case 'S':
                     command_solve()
+                    screen.forget()
                     print("Enter command:")
                 case _:
-                    if myboard.place_queen(command):
-                        show()
+                    # Errors are caught, so they can be printed at the prompt.
+                    with redirect_stdout(io.StringIO()) as message:
+                        placed = myboard.place_queen(command)
+                    if placed:
+                        update(command)
                     else:
-                        print("Enter command:")
+                        prompt(message.getvalue())
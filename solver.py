@@ -1,46 +1,1843 @@
 #!/usr/bin/env python
 """This module holds N-queens problem solving algorithm"""
 
+import gc
+import json
+import mmap
+import multiprocessing
+import os
+import queue
+import random
+import sqlite3
+import struct
 import sys
-from concurrent.futures import ProcessPoolExecutor
+import threading
+import time
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
 from argparse import ArgumentParser
+from contextlib import closing, contextmanager, nullcontext
+from functools import partial
+from itertools import islice
+from operator import add
 
 from codetiming import Timer
 
+try :
+    import numpy as np
+except ImportError :
+    np = None
+
 def valid(queens: list, col: int) -> bool :
     """ Checks if in column 'col' queen is placed properly. """
-    if queens[col] :
+    if col < len(queens) and queens[col] :
         for c, q in enumerate(queens):
             if q and c != col :
                 if queens[col] == q or abs(queens[col] - q) == abs(col - c) :
                     return False
     return True
 
-def basic_solve(queens: list, col=0) -> None :
-    """ Recurrently tries to fill list with queens. """
+class Stats :
+    """ Counters of a search kept per depth, that is number of queens on the board.
+
+    'nodes' counts arrangements visited, 'rejected' rows ruled out while expanding
+    them, 'solutions' complete arrangements found and 'time' seconds the search
+    spent at the depth, that is from visiting a node there to visiting the next one. Engines take
+    them as 'stats', with None nothing is counted. Stats of searches run in other
+    processes are added with +=, their times are summed. """
+
+    FIELDS = ('nodes', 'rejected', 'solutions', 'time')
+
+    def __init__(self) :
+        self.nodes, self.rejected, self.solutions, self.time = [], [], [], []
+        self.depth = 0
+        self.clock = None
+
+    def grow(self, depth: int) -> None :
+        """ Makes room for counters up to 'depth'. """
+        for _ in range(depth + 1 - len(self.nodes)) :
+            self.nodes.append(0)
+            self.rejected.append(0)
+            self.solutions.append(0)
+            self.time.append(0.0)
+
+    def move(self, depth: int) -> None :
+        """ Charges time since the last move to the current depth and goes to 'depth'. """
+        now = time.perf_counter()
+        if self.clock is not None :
+            self.time[self.depth] += now - self.clock
+        if depth >= len(self.nodes) :
+            self.grow(depth)
+        self.depth, self.clock = depth, now
+
+    def pause(self) -> None :
+        """ Stops the clock while a solution is handled outside the search or once it is over. """
+        if self.clock is not None :
+            self.time[self.depth] += time.perf_counter() - self.clock
+            self.clock = None
+
+    def node(self, depth: int, rejected=0, count=1) -> None :
+        """ Counts visited arrangements and rows ruled out while expanding them. """
+        self.move(depth)
+        self.nodes[depth] += count
+        self.rejected[depth] += rejected
+
+    def reject(self, depth: int, count=1) -> None :
+        """ Counts rows ruled out at 'depth' after they were tried. """
+        if depth >= len(self.nodes) :
+            self.grow(depth)
+        self.rejected[depth] += count
+
+    def found(self, depth: int, count=1) -> None :
+        """ Counts complete arrangements, they are visited nodes as well. """
+        if depth >= len(self.nodes) :
+            self.grow(depth)
+        self.nodes[depth] += count
+        self.solutions[depth] += count
+
+    def __iadd__(self, other) :
+        self.grow(len(other.nodes) - 1)
+        for name in self.FIELDS :
+            counters = getattr(self, name)
+            for depth, value in enumerate(getattr(other, name)) :
+                counters[depth] += value
+        return self
+
+    def visited(self) -> int :
+        """ Returns number of nodes visited at all depths. """
+        return sum(self.nodes)
+
+    def as_dict(self) -> dict :
+        """ Returns counters per depth and their totals, ready to be saved as JSON. """
+        return {
+            'depths': [dict(zip(('depth',) + self.FIELDS, row))
+                       for row in zip(range(len(self.nodes)), *(getattr(self, name) for name in self.FIELDS))],
+            'total': {name: sum(getattr(self, name)) for name in self.FIELDS},
+        }
+
+    def __str__(self) -> str :
+        lines = [f"{'depth':>5} {'nodes':>12} {'rejected':>12} {'solutions':>12} {'time':>10}"]
+        report = self.as_dict()
+        for row in report['depths'] + [report['total'] | {'depth': 'total'}] :
+            lines.append(f"{row['depth']:>5} {row['nodes']:>12} {row['rejected']:>12} "
+                         f"{row['solutions']:>12} {row['time']:>10.4f}")
+        return '\n'.join(lines)
+
+class Nodes :
+    """ Total number of visited nodes, taken by engines as 'stats' in place of Stats
+    when nothing else is needed, to report progress. It costs a fraction of what Stats do. """
+    __slots__ = ('nodes',)
+
+    def __init__(self) :
+        self.nodes = 0
+
+    def node(self, depth: int, rejected=0, count=1) -> None :
+        self.nodes += count
+
+    def found(self, depth: int, count=1) -> None :
+        self.nodes += count
+
+    def reject(self, depth: int, count=1) -> None :
+        pass
+
+    def pause(self) -> None :
+        pass
+
+    def visited(self) -> int :
+        """ Returns number of nodes visited. """
+        return self.nodes
+
+    def __iadd__(self, other) :
+        self.nodes += other.nodes
+        return self
+
+def basic_solutions(queens: list, col=0, stop=None, stats=None) :
+    """ Recurrently tries to fill list with queens, yields solutions as tuples.
+    Gives up as soon as the shared 'stop' flag is raised. """
+    if stop is not None and stop.value :
+        return
     if valid(queens, col) :
+        if stats is not None :
+            depth = len(queens) - queens.count(None)
         try :
             col = queens.index(None)
         except ValueError :
-            print(queens)
+            if stats is not None :
+                stats.found(depth)
+                stats.pause()
+            yield tuple(queens)
         else :
+            if stats is not None :
+                stats.node(depth)
             for row in range(1, len(queens) + 1) :
                 queens[col] = row
-                basic_solve(queens, col)
+                yield from basic_solutions(queens, col, stop, stats)
             queens[col] = None
+    elif stats is not None :
+        stats.reject(len(queens) - queens.count(None) - 1)
+
+def basic_solve(queens: list, col=0) -> None :
+    """ Recurrently tries to fill list with queens. """
+    for solution in basic_solutions(queens, col) :
+        print(list(solution))
+
+def masks(queens: list) -> tuple :
+    """ Returns bitmasks of rows and both diagonals occupied by placed queens.
+
+    Bit r-1 of the rows mask stands for row r. Diagonals are numbered
+    independently of the column order: 'up' diagonals by row - col + dim - 1,
+    'down' diagonals by row + col (rows and columns counted from 0). """
+    dim = len(queens)
+    rows = up = down = 0
+    for c, q in enumerate(queens) :
+        if q :
+            rows |= 1 << (q - 1)
+            up |= 1 << (q - 1 - c + dim - 1)
+            down |= 1 << (q - 1 + c)
+    return rows, up, down
+
+def bitboard_solutions(queens: list, col=0, stop=None, stats=None) :
+    """ Recurrently fills list with queens, picks free rows with bit operations.
+    Yields solutions as tuples, gives up as soon as the shared 'stop' flag is raised. """
+    dim = len(queens)
+    full = (1 << dim) - 1
+    empty = [c for c, q in enumerate(queens) if q is None]
+    base = dim - len(empty)
+    if not valid(queens, col) :
+        return
+
+    def place(i, rows, up, down) :
+        if i == len(empty) :
+            if stats is not None :
+                stats.found(base + i)
+                stats.pause()
+            yield tuple(queens)
+            return
+        if stop is not None and stop.value :
+            return
+        c = empty[i]
+        free = ~(rows | (up >> (dim - 1 - c)) | (down >> c)) & full
+        if stats is not None :
+            stats.node(base + i, dim - free.bit_count())
+        while free :
+            bit = free & -free
+            free ^= bit
+            queens[c] = bit.bit_length()
+            yield from place(i + 1, rows | bit, up | (bit << (dim - 1 - c)), down | (bit << c))
+        queens[c] = None
+
+    yield from place(0, *masks(queens))
+
+def bitboard_solve(queens: list, col=0) -> None :
+    """ Recurrently fills list with queens, picks free rows with bit operations. """
+    for solution in bitboard_solutions(queens, col) :
+        print(list(solution))
+
+def bitboard_count(queens: list, col=0, stats=None) -> int :
+    """ Returns number of ways the list can be filled with queens, nothing is printed.
+    Counting into 'stats' takes a separate copy of the search, so the plain one pays nothing for it. """
+    dim = len(queens)
+    full = (1 << dim) - 1
+    empty = [c for c, q in enumerate(queens) if q is None]
+    if not valid(queens, col) :
+        return 0
+    if not empty :
+        if stats is not None :
+            stats.found(dim)
+        return 1
+    last = len(empty) - 1
+    base = dim - len(empty)
+
+    def count(i, rows, up, down) -> int :
+        c = empty[i]
+        free = ~(rows | (up >> (dim - 1 - c)) | (down >> c)) & full
+        if i == last :
+            return free.bit_count()
+        total = 0
+        while free :
+            bit = free & -free
+            free ^= bit
+            total += count(i + 1, rows | bit, up | (bit << (dim - 1 - c)), down | (bit << c))
+        return total
+
+    def measured(i, rows, up, down) -> int :
+        c = empty[i]
+        free = ~(rows | (up >> (dim - 1 - c)) | (down >> c)) & full
+        stats.node(base + i, dim - free.bit_count())
+        if i == last :
+            stats.found(base + i + 1, free.bit_count())
+            return free.bit_count()
+        total = 0
+        while free :
+            bit = free & -free
+            free ^= bit
+            total += measured(i + 1, rows | bit, up | (bit << (dim - 1 - c)), down | (bit << c))
+        return total
+
+    if stats is None :
+        return count(0, *masks(queens))
+    total = measured(0, *masks(queens))
+    stats.pause()
+    return total
+
+# Nodes visited by the iterative engine between checks of the stop flag.
+STOP_INTERVAL = 1024
+
+def iterative_solutions(queens: list, col=0, stop=None, stats=None) :
+    """ Fills list with queens without recursion, yields the same solutions as basic_solutions
+    in the same order.
+
+    Search state lives in arrays allocated up front, one slot per empty column:
+    rows still to try there and masks of rows and diagonals taken before it.
+    The shared 'stop' flag is checked every STOP_INTERVAL nodes. """
+    if not valid(queens, col) :
+        return
+    dim = len(queens)
+    full = (1 << dim) - 1
+    empty = [c for c, q in enumerate(queens) if q is None]
+    if not empty :
+        if stats is not None :
+            stats.found(dim)
+        yield tuple(queens)
+        return
+    last = len(empty) - 1
+    base = dim - len(empty)
+    shift = [dim - 1 - c for c in empty]
+    free = [0] * len(empty)
+    rows, up, down = [0] * len(empty), [0] * len(empty), [0] * len(empty)
+    rows[0], up[0], down[0] = masks(queens)
+    free[0] = ~(rows[0] | (up[0] >> shift[0]) | (down[0] >> empty[0])) & full
+    if stats is not None :
+        stats.node(base, dim - free[0].bit_count())
+    i = nodes = 0
+    while True :
+        f = free[i]
+        if not f :
+            queens[empty[i]] = None
+            if i == 0 :
+                if stats is not None :
+                    stats.pause()
+                return
+            i -= 1
+            continue
+        bit = f & -f
+        free[i] = f ^ bit
+        queens[empty[i]] = bit.bit_length()
+        if i == last :
+            if stats is not None :
+                stats.found(base + i + 1)
+                stats.pause()
+            yield tuple(queens)
+            continue
+        if stop is not None :
+            nodes += 1
+            if nodes % STOP_INTERVAL == 0 and stop.value :
+                return
+        r, u, d = rows[i] | bit, up[i] | (bit << shift[i]), down[i] | (bit << empty[i])
+        i += 1
+        rows[i], up[i], down[i] = r, u, d
+        free[i] = ~(r | (u >> shift[i]) | (d >> empty[i])) & full
+        if stats is not None :
+            stats.node(base + i, dim - free[i].bit_count())
+
+def construct(dim: int) -> array :
+    """ Returns one solution for an empty board in linear time, built from the explicit
+    pattern: even rows, then odd rows, with a few of them moved when dim % 6 is 2 or 3.
+    Rows are stored in an array, no list of ints is built on the way. """
+    if dim in (2, 3) :
+        raise ValueError(f"There is no solution for dimension={dim}")
+    evens = array(typecode(dim), range(2, dim + 1, 2))
+    odds = array(typecode(dim), range(1, dim + 1, 2))
+    if dim % 6 == 2 :
+        odds = array(odds.typecode, [3, 1]) + odds[3:] + odds[2:3]
+    elif dim % 6 == 3 :
+        evens = evens[1:] + evens[:1]
+        odds = odds[2:] + odds[:2]
+    return evens + odds
+
+def verify(queens) -> bool :
+    """ Checks in linear time that every column holds a queen and none of them attack
+    each other, the rules of valid() applied to all columns at once. """
+    dim = len(queens)
+    rows, up, down = bytearray(dim), bytearray(2 * dim), bytearray(2 * dim)
+    for c, q in enumerate(queens) :
+        if not q or q > dim or rows[q - 1] or up[q - 1 - c + dim] or down[q - 1 + c] :
+            return False
+        rows[q - 1] = up[q - 1 - c + dim] = down[q - 1 + c] = 1
+    return True
+
+def construct_solutions(queens: list, col=0, stop=None, stats=None) :
+    """ Yields the constructed and verified solution, works only for an empty board.
+    Nothing is yielded for dimensions 2 and 3, which have no solution like the other engines.
+    There is no search, so 'stats' are left untouched. """
+    if any(queens) :
+        raise ValueError("Construction works only for an empty chessboard")
+    if len(queens) in (2, 3) :
+        return
+    solution = construct(len(queens))
+    if not verify(solution) :
+        raise ArithmeticError(f"Constructed arrangement for dimension={len(queens)} is not a solution")
+    yield solution
+
+# Default time budget in seconds and number of steps per dimension before a restart of local search.
+LOCAL_BUDGET = 60.0
+LOCAL_STEPS = 20
+
+def min_conflicts(queens: list, budget=LOCAL_BUDGET, restarts=None, steps=None, seed=None, stop=None) :
+    """ Looks for one completion of the queens with min-conflicts local search.
+
+    Empty columns start with a random permutation of the rows left over by
+    the pinned queens, then a random conflicted column is moved to its least
+    attacked row, until no queen is attacked. Counters of queens in every row
+    and diagonal are updated with each move, pinned queens never move. After
+    'steps' moves (LOCAL_STEPS * dim by default) the search restarts, at most
+    'restarts' times. Returns array of rows, or None if it gives up because
+    restarts, the time 'budget' in seconds or the 'stop' flag ran out. """
+    dim = len(queens)
+    rng = random.Random(seed)
+    columns = [c for c, q in enumerate(queens) if q is None]
+    taken = {q - 1 for q in queens if q}
+    spare = [r for r in range(dim) if r not in taken]
+    if not columns :
+        return array(typecode(dim), queens) if verify(queens) else None
+    steps = steps if steps is not None else LOCAL_STEPS * dim
+    deadline = time.monotonic() + budget
+    attempt = 0
+    while restarts is None or attempt <= restarts :
+        attempt += 1
+        current = [q - 1 if q else None for q in queens]
+        rng.shuffle(spare)
+        for c, r in zip(columns, spare) :
+            current[c] = r
+        rows, up, down = [0] * dim, [0] * (2 * dim), [0] * (2 * dim)
+        for c, r in enumerate(current) :
+            rows[r] += 1
+            up[r - c + dim - 1] += 1
+            down[r + c] += 1
+        conflicted = []
+        for step in range(steps) :
+            if not conflicted :
+                conflicted = [c for c in columns
+                              if rows[current[c]] + up[current[c] - c + dim - 1] + down[current[c] + c] > 3]
+                if not conflicted :
+                    return array(typecode(dim), (r + 1 for r in current))
+            if step % 256 == 0 and (time.monotonic() > deadline or (stop is not None and stop.value)) :
+                return None
+            k = rng.randrange(len(conflicted))
+            c = conflicted[k]
+            conflicted[k] = conflicted[-1]
+            conflicted.pop()
+            q = current[c]
+            if rows[q] + up[q - c + dim - 1] + down[q + c] == 3 :
+                continue
+            costs = list(map(add, map(add, rows, up[dim - 1 - c:2 * dim - 1 - c]), down[c:c + dim]))
+            costs[q] -= 3
+            best = min(costs)
+            try :
+                r = costs.index(best, rng.randrange(dim))
+            except ValueError :
+                r = costs.index(best)
+            rows[q] -= 1
+            up[q - c + dim - 1] -= 1
+            down[q + c] -= 1
+            rows[r] += 1
+            up[r - c + dim - 1] += 1
+            down[r + c] += 1
+            current[c] = r
+        if time.monotonic() > deadline :
+            return None
+    return None
+
+def local_solutions(queens: list, col=0, stop=None, stats=None) :
+    """ Yields the solution found by min-conflicts local search, nothing if it gives up.
+    It does not walk a search tree, so 'stats' are left untouched. """
+    solution = min_conflicts(queens, stop=stop)
+    if solution is not None :
+        yield tuple(solution)
+
+def mrv_search(queens: list, col=0, stop=None, stats=None) :
+    """ Fills the list with queens always branching on the empty column with the fewest
+    free rows, yields solutions as soon as they are found, in no particular order.
+
+    Every free row needs a queen from one of the empty columns, so an arrangement
+    is given up as soon as any empty column has no free row left or some free row
+    is not free in any of them. """
+    dim = len(queens)
+    full = (1 << dim) - 1
+    if not all(valid(queens, c) for c in range(dim)) :
+        return
 
-def multi_solve(queens: list, col=0) -> None :
-    """ Wrapper that distributes calculations between processes. """
+    def place(empty, rows, up, down) :
+        if not empty :
+            if stats is not None :
+                stats.found(dim)
+            yield tuple(queens)
+            return
+        if stop is not None and stop.value :
+            return
+        best, options, cover = None, 0, 0
+        for c in empty :
+            free = ~(rows | (up >> (dim - 1 - c)) | (down >> c)) & full
+            if best is None or free.bit_count() < options.bit_count() :
+                best, options = c, free
+            cover |= free
+            if not free :
+                break
+        if not options or cover != ~rows & full :
+            if stats is not None :
+                stats.node(dim - len(empty), dim)
+            return
+        if stats is not None :
+            stats.node(dim - len(empty), dim - options.bit_count())
+        rest = [c for c in empty if c != best]
+        while options :
+            bit = options & -options
+            options ^= bit
+            queens[best] = bit.bit_length()
+            yield from place(rest, rows | bit, up | (bit << (dim - 1 - best)), down | (bit << best))
+        queens[best] = None
+
+    yield from place([c for c, q in enumerate(queens) if q is None], *masks(queens))
+    if stats is not None :
+        stats.pause()
+
+def mrv_solutions(queens: list, col=0, stop=None, stats=None) :
+    """ Yields solutions found by most constrained column first search,
+    sorted into the order of the other engines once the search is over. """
+    yield from sorted(mrv_search(queens, col, stop, stats))
+
+def mrv_count(queens: list, col=0, stats=None) -> int :
+    """ Returns number of solutions found by most constrained column first search. """
+    return sum(1 for _ in mrv_search(queens, col, None, stats))
+
+def propagate(queens: list, domains: dict, rows: int, up: int, down: int) -> tuple | None :
+    """ Narrows 'domains' of empty columns, bitmasks of rows still possible there,
+    until they are arc consistent, in place. Columns left with a single row get
+    their queen placed in 'queens' and leave 'domains'. Returns updated masks
+    of rows and diagonals taken by queens, None when some domain runs empty.
+
+    Rows attacked by placed queens are dropped at once with the masks. A row is
+    also dropped from a column if some other column with at most three rows left
+    would be attacked in all of them. Every free row needs a queen, so a row left
+    in a single domain is placed there and a row left in none means failure. """
+    dim = len(queens)
+    full = (1 << dim) - 1
+    while True :
+        for c in [c for c, d in domains.items() if not d & (d - 1)] :
+            bit = domains.pop(c)
+            if bit & (rows | (up >> (dim - 1 - c)) | (down >> c)) :
+                return None
+            queens[c] = bit.bit_length()
+            rows, up, down = rows | bit, up | (bit << (dim - 1 - c)), down | (bit << c)
+        changed = False
+        once = twice = 0
+        for c, d in domains.items() :
+            kept = d & ~(rows | (up >> (dim - 1 - c)) | (down >> c))
+            if kept != d :
+                if not kept :
+                    return None
+                domains[c] = kept
+                changed = True
+            twice |= once & kept
+            once |= kept
+        if changed :
+            continue
+        for c, d in domains.items() :
+            if not 2 <= (size := d.bit_count()) <= 3 :
+                continue
+            low, high = (d & -d).bit_length() - 1, d.bit_length() - 1
+            if size == 2 :
+                # A queen is attacked in both rows only by a queen in one of them at distance
+                # equal to the gap, or by one halfway between them at half of the gap.
+                drops = [(high - low, d)]
+                if (high - low) % 2 == 0 :
+                    drops.append(((high - low) // 2, 1 << (low + high) // 2))
+            else :
+                # Three rows are all attacked only from the middle one, with equal gaps.
+                mid = (d ^ (1 << low) ^ (1 << high)).bit_length() - 1
+                drops = [(mid - low, 1 << mid)] if mid - low == high - mid else []
+            for dist, drop in drops :
+                for c2 in (c - dist, c + dist) :
+                    if c2 in domains and domains[c2] & drop :
+                        if not (kept := domains[c2] & ~drop) :
+                            return None
+                        domains[c2] = kept
+                        changed = True
+        if changed :
+            continue
+        if once != ~rows & full :
+            return None
+        singles = once & ~twice
+        for c, d in domains.items() :
+            if (only := d & singles) :
+                if only & (only - 1) :
+                    return None
+                if only != d :
+                    domains[c] = only
+                    changed = True
+        if not changed :
+            return rows, up, down
+
+def arc_search(queens: list, col=0, stop=None, stats=None) :
+    """ Completes the arrangement keeping a domain of possible rows for every empty column,
+    yields solutions as soon as they are found, in no particular order.
+
+    Domains are made arc consistent with propagate() after every placement, the
+    search backtracks as soon as that fails and branches on the smallest domain otherwise. """
+    dim = len(queens)
+    full = (1 << dim) - 1
+    if not all(valid(queens, c) for c in range(dim)) :
+        return
+
+    def search(queens, domains, rows, up, down) :
+        if stop is not None and stop.value :
+            return
+        depth = dim - len(domains)
+        if (taken := propagate(queens, domains, rows, up, down)) is None :
+            if stats is not None :
+                stats.node(depth, dim)
+            return
+        if not domains :
+            if stats is not None :
+                stats.found(dim)
+            yield tuple(queens)
+            return
+        c = min(domains, key=lambda c: domains[c].bit_count())
+        options = domains[c]
+        if stats is not None :
+            stats.node(depth, dim - options.bit_count())
+        while options :
+            row = options & -options
+            options ^= row
+            child = dict(domains)
+            child[c] = row
+            yield from search(list(queens), child, *taken)
+
+    yield from search(list(queens), {c: full for c, q in enumerate(queens) if q is None}, *masks(queens))
+    if stats is not None :
+        stats.pause()
+
+def arc_solutions(queens: list, col=0, stop=None, stats=None) :
+    """ Yields solutions found by the arc consistency search,
+    sorted into the order of the other engines once the search is over. """
+    yield from sorted(arc_search(queens, col, stop, stats))
+
+def arc_count(queens: list, col=0, stats=None) -> int :
+    """ Returns number of solutions found by the arc consistency search. """
+    return sum(1 for _ in arc_search(queens, col, None, stats))
+
+ENGINES = {
+    'basic': basic_solutions,
+    'bitboard': bitboard_solutions,
+    'iterative': iterative_solutions,
+    'construct': construct_solutions,
+    'local': local_solutions,
+    'mrv': mrv_solutions,
+    'arc': arc_solutions,
+}
+
+# Engines yielding solutions as soon as they are found, used instead of the sorting ones of ENGINES
+# when only a limited number of solutions is asked for.
+UNORDERED = {
+    'mrv': mrv_search,
+    'arc': arc_search,
+}
+
+def lister(engine: str, limit=None) :
+    """ Returns the engine's generator, the one of UNORDERED if there is one and 'limit' is given. """
+    if limit is not None and engine in UNORDERED :
+        return UNORDERED[engine]
+    return ENGINES[engine]
+
+# Engines yielding at most one of the solutions, their results are never cached.
+PARTIAL = ('construct', 'local')
+
+# Engines able to count solutions without listing them.
+COUNTERS = {
+    'bitboard': bitboard_count,
+    'mrv': mrv_count,
+    'arc': arc_count,
+}
+
+def counter(engine: str) :
+    """ Returns the counting function of the engine, throws an error if it has none. """
+    if engine not in COUNTERS :
+        raise ValueError(f"{engine} engine cannot count solutions, use one of: {', '.join(COUNTERS)}")
+    return COUNTERS[engine]
+
+# Number of queries a pool can cancel independently, more of them wait for a free stop flag.
+QUERIES = 64
+
+# Stop flags shared by workers of a pool, one per query, raised to make engines give up its searches.
+FLAGS = None
+
+def init_worker(flags) -> None :
+    """ Runs in every new worker, keeps the pool's stop flags. """
+    global FLAGS
+    FLAGS = flags
+
+class Flag :
+    """ One of the pool's stop flags, read by engines through 'value' like a shared value. """
+    __slots__ = ('flags', 'index')
+
+    def __init__(self, flags, index: int) :
+        self.flags = flags
+        self.index = index
+
+    @property
+    def value(self) -> int :
+        return self.flags[self.index]
+
+def warm_up() -> int :
+    """ Unpickling it is what makes a worker import this module. """
+    return os.getpid()
+
+class SolverPool(ProcessPoolExecutor) :
+    """ Long lived pool of worker processes, meant to be reused across solves.
+
+    All workers are started and have the solver imported before the pool is
+    returned. Pass it as 'pool' to the parallel solvers and call shutdown()
+    when it is no longer needed. Every query that may be cancelled takes one
+    of the stop 'flags' for itself, so queries sharing the pool do not stop each other. """
+
+    def __init__(self, workers=None) :
+        self.flags = multiprocessing.RawArray('b', QUERIES)
+        self.free = queue.Queue()
+        for index in range(QUERIES) :
+            self.free.put(index)
+        super().__init__(workers, initializer=init_worker, initargs=(self.flags,))
+        self.workers = self._max_workers
+        for future in [self.submit(warm_up) for _ in range(self.workers)] :
+            future.result()
+
+    @contextmanager
+    def query(self) :
+        """ Lends index of a lowered stop flag for the time of one query, waits if none is free. """
+        index = self.free.get()
+        self.flags[index] = 0
+        try :
+            yield index
+        finally :
+            self.free.put(index)
+
+def executor(pool=None) :
+    """ Returns context of given pool, or of a temporary one if none is given. """
+    return nullcontext(pool) if pool is not None else SolverPool()
+
+def workers(pool=None) -> int | None :
+    """ Returns number of processes of the given pool. """
+    return pool.workers if isinstance(pool, SolverPool) else None
+
+# Number of tasks per worker process aimed at when split depth is chosen automatically.
+TASKS_PER_WORKER = 8
+
+# Largest dimension whose row masks fit NumPy's unsigned 64-bit integers.
+FRONTIER_MAX_DIM = 64
+
+def frontier(queens: list, depth=None, target=None, stats=None) -> list :
+    """ Expands the top of the search tree breadth-first with NumPy, returns valid arrangements
+    with next 'depth' empty columns filled, in search order. Without 'depth' columns are filled
+    until there are at least 'target' arrangements or no empty columns are left.
+
+    Every level is a few array operations on masks of rows and both diagonals
+    taken by queens placed so far, one element per prefix. Diagonal masks are
+    shifted while moving from column to column, rows attacked by initial queens
+    are computed once per column. Works for dimensions up to FRONTIER_MAX_DIM. """
+    dim = len(queens)
+    full = (1 << dim) - 1
+    empty = [c for c, q in enumerate(queens) if q is None]
+    levels = len(empty) if depth is None else min(depth, len(empty))
+    if not levels or (target is not None and target <= 1) :
+        return [list(queens)]
+    fixed = [0] * dim
+    for c0, q in enumerate(queens) :
+        if q :
+            for c in range(dim) :
+                fixed[c] |= (1 << (q - 1)) | (1 << (q - 1 + c - c0) if 0 <= q - 1 + c - c0 < dim else 0) \
+                            | (1 << (q - 1 - c + c0) if 0 <= q - 1 - c + c0 < dim else 0)
+    one, mask = np.uint64(1), np.uint64(full)
+    bits = np.arange(dim, dtype=np.uint64)
+    rows = left = right = np.zeros(1, dtype=np.uint64)
+    placed = np.zeros((1, 0), dtype=np.int64)
+    filled = []
+    for c in range(empty[0], dim) :
+        if queens[c] is None :
+            free = ~(rows | left | right | np.uint64(fixed[c])) & mask
+            parent, row = np.nonzero((free[:, None] >> bits) & one)
+            if stats is not None :
+                stats.node(dim - len(empty) + len(filled), dim * len(rows) - len(parent), len(rows))
+            bit = one << row.astype(np.uint64)
+            rows, left, right = rows[parent] | bit, left[parent] | bit, right[parent] | bit
+            placed = np.concatenate([placed[parent], row[:, None] + 1], axis=1)
+            filled.append(c)
+            if len(filled) == levels or not len(placed) or (target is not None and len(placed) >= target) :
+                break
+        left = (left << one) & mask
+        right = right >> one
+    # Columns up to the last filled one hold queens in every prefix, so they are built
+    # as integers and only the rest of the arrangement is appended to each of them.
+    end = filled[-1] + 1
+    head = np.empty((len(placed), end), dtype=np.int64)
+    head[:] = [q or 0 for q in queens[:end]]
+    head[:, filled] = placed
+    tail = queens[end:]
+    with paused_gc() :
+        prefixes = head.tolist()
+        if tail :
+            for prefix in prefixes :
+                prefix.extend(tail)
+    return prefixes
+
+@contextmanager
+def paused_gc() :
+    """ Pauses the cyclic garbage collector while lots of lists are built. They hold only
+    numbers and None, yet the collector would keep walking through all of them. """
+    enabled = gc.isenabled()
+    gc.disable()
     try :
-        col = queens.index(None)
-    except ValueError :
-        print(queens)
+        yield
+    finally :
+        if enabled :
+            gc.enable()
+
+def split(queens: list, depth: int, stats=None) -> list :
+    """ Returns all valid arrangements with next 'depth' empty columns filled, in search order.
+    Only the expanded arrangements are counted in 'stats', the returned ones are left to the search. """
+    dim = len(queens)
+    if np is not None and 0 < dim <= FRONTIER_MAX_DIM :
+        return frontier(queens, depth, stats=stats)
+    full = (1 << dim) - 1
+    base = dim - queens.count(None)
+    empty = [c for c, q in enumerate(queens) if q is None][:depth]
+    queens = list(queens)
+    prefixes = []
+
+    def place(i, rows, up, down) :
+        if i == len(empty) :
+            prefixes.append(list(queens))
+            return
+        c = empty[i]
+        free = ~(rows | (up >> (dim - 1 - c)) | (down >> c)) & full
+        if stats is not None :
+            stats.node(base + i, dim - free.bit_count())
+        while free :
+            bit = free & -free
+            free ^= bit
+            queens[c] = bit.bit_length()
+            place(i + 1, rows | bit, up | (bit << (dim - 1 - c)), down | (bit << c))
+        queens[c] = None
+
+    with paused_gc() :
+        place(0, *masks(queens))
+    return prefixes
+
+def shards(queens: list, depth=None, workers=None, stats=None) -> list :
+    """ Splits the search into prefixes that can be solved independently.
+
+    Without 'depth' empty columns are filled one by one until there are
+    TASKS_PER_WORKER prefixes for every worker, so that the pool stays busy
+    while the biggest subtrees are finishing. """
+    target = TASKS_PER_WORKER * (workers or os.cpu_count() or 1)
+    if depth is not None :
+        prefixes = split(queens, depth, stats)
+    elif np is not None and 0 < len(queens) <= FRONTIER_MAX_DIM :
+        prefixes = frontier(queens, target=target, stats=stats)
     else :
-        with ProcessPoolExecutor() as executor :
-            for row in range(1, len(queens) + 1) :
-                queens[col] = row
-                executor.submit(basic_solve, list(queens), col)
-            queens[col] = None
+        prefixes = [list(queens)]
+        for _ in range(queens.count(None)) :
+            if len(prefixes) >= target :
+                break
+            prefixes = [p for prefix in prefixes for p in split(prefix, 1, stats)]
+    if stats is not None :
+        stats.pause()
+    return prefixes
+
+def multi_solve(queens: list, col=0, engine='basic', depth=None, pool=None, limit=None) -> None :
+    """ Wrapper that distributes calculations between processes.
+    Workers return their solutions, which are printed here in search order,
+    or in order of finding when only 'limit' of them are asked for. """
+    for solution in multi_solutions(queens, engine, depth, pool, limit) :
+        print(list(solution))
+
+def multi_count(queens: list, col=0, depth=None, pool=None, stats=None, progress=None, engine='bitboard') -> int :
+    """ Wrapper that distributes counting between processes and sums their results.
+    Workers' 'stats' are added to the given ones, finished prefixes are reported to 'progress'. """
+    counter(engine)
+    with executor(pool) as ex :
+        prefixes = shards(queens, depth, workers(pool), stats)
+        if progress is not None :
+            progress.total = len(prefixes)
+        total = 0
+        task = COUNTERS[engine] if stats is None else partial(measured_count, engine=engine, stats=type(stats))
+        for count in ex.map(task, prefixes) :
+            if stats is not None :
+                count, searched = count
+                stats += searched
+            total += count
+            if progress is not None :
+                progress.shard(count)
+        return total
+
+def measured_count(queens: list, engine='bitboard', stats=Stats) -> tuple :
+    """ Returns number of solutions with a new 'stats' of the search, Stats or Nodes,
+    run in worker processes. """
+    stats = stats()
+    return counter(engine)(queens, 0, stats), stats
+
+def collect(engine: str, queens: list, col=0, limit=None, stats=None, query=None) -> list | tuple :
+    """ Returns solutions found by the engine, used to ship results from worker processes.
+    Stops after 'limit' solutions or when the pool's stop flag of given 'query' is raised.
+    Given 'stats', Stats or Nodes, they are returned together with a new one of the search. """
+    stop = None if query is None else Flag(FLAGS, query)
+    if stats is None :
+        return list(islice(lister(engine, limit)(queens, col, stop), limit))
+    stats = stats()
+    solutions = list(islice(lister(engine, limit)(queens, col, stop, stats), limit))
+    stats.pause()
+    return solutions, stats
+
+def multi_solutions(queens: list, engine='bitboard', depth=None, pool=None, limit=None, stats=None,
+                    progress=None) :
+    """ Splits search into prefixes solved in separate processes, yields solutions
+    in the same order as the serial engine. Each worker sends back a batch of
+    solutions for its prefix, exceptions raised there are re-raised here.
+    Closing the generator cancels prefixes that were not started yet.
+
+    With 'limit' solutions are yielded in order of finding instead. Once that
+    many are found the stop flag of this query makes the running workers give up.
+    Workers' 'stats' are added to the given ones as their batches arrive,
+    and every batch counts as a finished prefix for 'progress'. """
+    prefixes = shards(queens, depth, workers(pool), stats)
+    task = collect if stats is None else partial(collect, stats=type(stats))
+    if progress is not None :
+        progress.total = len(prefixes)
+    with executor(pool) as ex :
+        if limit is None :
+            with closing(ex.map(task, [engine] * len(prefixes), prefixes)) as batches :
+                for batch in batches :
+                    if stats is not None :
+                        batch, searched = batch
+                        stats += searched
+                    if progress is not None :
+                        progress.shard()
+                    yield from batch
+            return
+        with ex.query() as query :
+            futures = [ex.submit(task, engine, prefix, 0, limit, query=query) for prefix in prefixes]
+            try :
+                found = 0
+                for future in as_completed(futures) :
+                    batch = future.result()
+                    if stats is not None :
+                        batch, searched = batch
+                        stats += searched
+                        futures.remove(future)
+                    if progress is not None :
+                        progress.shard()
+                    for solution in batch :
+                        yield solution
+                        found += 1
+                        if found == limit :
+                            return
+            finally :
+                ex.flags[query] = 1
+                for future in futures :
+                    future.cancel()
+                wait(futures)
+                if stats is not None :
+                    for future in futures :
+                        if not future.cancelled() and future.exception() is None :
+                            stats += future.result()[1]
+
+# Nodes visited by a work stealing worker between checks for idle workers.
+STEAL_INTERVAL = 1024
+# Solutions sent by a work stealing worker in one message.
+BATCH_SIZE = 1024
+
+def steal_search(task: tuple, tasks, pending, queued, hungry, report) -> int :
+    """ Explicit stack search of one task, gives away part of its work to idle workers.
+
+    A task is a valid prefix and a mask of rows allowed in its first empty column.
+    Every STEAL_INTERVAL nodes, if there are more idle workers than queued tasks,
+    half of the remaining rows on the shallowest level that still has some are
+    handed over as a new task. report(queens) is called for every solution,
+    or with None when it is only counted. Returns number of solutions found. """
+    queens, allowed = task
+    dim = len(queens)
+    full = (1 << dim) - 1
+    empty = [c for c, q in enumerate(queens) if q is None]
+    if not empty :
+        if report is not None :
+            report(tuple(queens))
+        return 1
+    last = len(empty) - 1
+    free = [0] * len(empty)
+    rows, up, down = [0] * len(empty), [0] * len(empty), [0] * len(empty)
+    rows[0], up[0], down[0] = masks(queens)
+    c = empty[0]
+    free[0] = ~(rows[0] | (up[0] >> (dim - 1 - c)) | (down[0] >> c)) & full & allowed
+    found = nodes = 0
+    i = 0
+    while i >= 0 :
+        if i == last and report is None :
+            found += free[i].bit_count()
+            free[i] = 0
+        if not free[i] :
+            queens[empty[i]] = None
+            i -= 1
+            continue
+        bit = free[i] & -free[i]
+        free[i] ^= bit
+        c = empty[i]
+        queens[c] = bit.bit_length()
+        if i == last :
+            found += 1
+            report(tuple(queens))
+            continue
+        nodes += 1
+        if nodes % STEAL_INTERVAL == 0 and hungry.value > queued.value :
+            j = 0
+            while j < i and not free[j] :
+                j += 1
+            if free[j] :
+                give = free[j]
+                for _ in range(give.bit_count() // 2) :
+                    give &= give - 1
+                free[j] ^= give
+                prefix = queens[:]
+                for col in empty[j:] :
+                    prefix[col] = None
+                with pending.get_lock() :
+                    pending.value += 1
+                with queued.get_lock() :
+                    queued.value += 1
+                tasks.put((prefix, give))
+        rows[i + 1] = rows[i] | bit
+        up[i + 1] = up[i] | (bit << (dim - 1 - c))
+        down[i + 1] = down[i] | (bit << c)
+        i += 1
+        c = empty[i]
+        free[i] = ~(rows[i] | (up[i] >> (dim - 1 - c)) | (down[i] >> c)) & full
+    return found
+
+def steal_worker(tasks, results, pending, queued, hungry, count_only: bool) -> None :
+    """ Work stealing worker process: takes tasks until all of them are finished. """
+    found = 0
+    batch = []
+
+    def report(solution) :
+        batch.append(solution)
+        if len(batch) == BATCH_SIZE :
+            results.put(('solutions', list(batch)))
+            batch.clear()
+
+    idle = False
+    try :
+        while True :
+            try :
+                task = tasks.get(timeout=0.01)
+            except queue.Empty :
+                if not idle :
+                    idle = True
+                    with hungry.get_lock() :
+                        hungry.value += 1
+                if pending.value == 0 :
+                    break
+                continue
+            if idle :
+                idle = False
+                with hungry.get_lock() :
+                    hungry.value -= 1
+            with queued.get_lock() :
+                queued.value -= 1
+            found += steal_search(task, tasks, pending, queued, hungry, None if count_only else report)
+            with pending.get_lock() :
+                pending.value -= 1
+    except Exception as error :
+        results.put(('error', error))
+    if batch :
+        results.put(('solutions', batch))
+    results.put(('done', found))
+
+def steal_run(queens: list, count_only: bool, depth=None, workers=None) :
+    """ Runs work stealing workers, yields messages they send until all of them are done. """
+    workers = workers or os.cpu_count() or 1
+    full = (1 << len(queens)) - 1
+    tasks, results = multiprocessing.Queue(), multiprocessing.Queue()
+    seeds = shards(queens, depth, workers)
+    pending = multiprocessing.Value('q', len(seeds))
+    queued = multiprocessing.Value('q', len(seeds))
+    hungry = multiprocessing.Value('q', 0)
+    for prefix in seeds :
+        tasks.put((prefix, full))
+    processes = [multiprocessing.Process(target=steal_worker, daemon=True,
+                                         args=(tasks, results, pending, queued, hungry, count_only))
+                 for _ in range(workers)]
+    for process in processes :
+        process.start()
+    try :
+        done = 0
+        while done < workers :
+            kind, value = results.get()
+            if kind == 'error' :
+                raise value
+            if kind == 'done' :
+                done += 1
+            yield kind, value
+    finally :
+        for process in processes :
+            if process.is_alive() :
+                process.terminate()
+            process.join()
+
+def steal_count(queens: list, depth=None, workers=None) -> int :
+    """ Counts solutions with work stealing scheduler. """
+    return sum(value for kind, value in steal_run(queens, True, depth, workers) if kind == 'done')
+
+def steal_solutions(queens: list, depth=None, workers=None) :
+    """ Yields solutions found with work stealing scheduler, in no particular order. """
+    with closing(steal_run(queens, False, depth, workers)) as messages :
+        for kind, value in messages :
+            if kind == 'solutions' :
+                yield from value
+
+SCHEDULERS = ('static', 'steal')
+
+# Minimal number of seconds between two progress events.
+PROGRESS_INTERVAL = 0.5
+
+class Progress :
+    """ Reports progress of a search as lines of JSON written to 'file'.
+
+    The search only bumps counters: finished prefixes ('done' out of 'total'),
+    solutions and visited nodes in 'stats', Stats if the search is counted
+    anyway, otherwise just Nodes. A background thread reads the counters every 'interval'
+    seconds, so reporting never waits on the search and the search never waits
+    on the file. Used as a context manager, it writes a last event with
+    "event": "done" on exit. """
+
+    def __init__(self, file, interval=PROGRESS_INTERVAL, stats=None) :
+        self.file, self.interval, self.stats = file, interval, stats
+        self.total = self.done = self.solutions = 0
+        self.start = time.monotonic()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def __enter__(self) :
+        self.start = time.monotonic()
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None :
+        self.stopped.set()
+        self.thread.join()
+        self.report('done')
+
+    def shard(self, solutions=0) -> None :
+        """ Counts a finished prefix of the search and solutions found there. """
+        self.done += 1
+        self.solutions += solutions
+
+    def event(self, name='progress') -> dict :
+        """ Returns a snapshot of the counters with rate and estimated time left. """
+        elapsed = time.monotonic() - self.start
+        nodes = self.stats.visited() if self.stats is not None else None
+        return {
+            'event': name,
+            'shards_done': self.done,
+            'shards_total': self.total,
+            'solutions': self.solutions,
+            'nodes': nodes,
+            'nodes_per_second': nodes / elapsed if nodes is not None and elapsed else None,
+            'elapsed': elapsed,
+            'eta': elapsed * (self.total - self.done) / self.done if self.done and self.total else None,
+        }
+
+    def report(self, name='progress') -> None :
+        print(json.dumps(self.event(name)), file=self.file, flush=True)
+
+    def run(self) -> None :
+        while not self.stopped.wait(self.interval) :
+            self.report()
+
+def sharded_solutions(queens: list, engine='bitboard', depth=None, stats=None, progress=None, limit=None) :
+    """ Runs the engine on prefixes of the search one after another in this process,
+    yields solutions in the usual order and reports every finished prefix to 'progress'.
+    Given 'limit' engines of UNORDERED yield them in order of finding instead. """
+    prefixes = shards(queens, depth, None, stats)
+    if progress is not None :
+        progress.total = len(prefixes)
+    for prefix in prefixes :
+        yield from lister(engine, limit)(prefix, 0, None, stats)
+        if progress is not None :
+            progress.shard()
+
+def sharded_count(queens: list, depth=None, stats=None, progress=None, engine='bitboard') -> int :
+    """ Counts solutions of prefixes of the search one after another in this process,
+    reports every finished prefix to 'progress'. """
+    count_prefix = counter(engine)
+    prefixes = shards(queens, depth, None, stats)
+    if progress is not None :
+        progress.total = len(prefixes)
+    total = 0
+    for prefix in prefixes :
+        count = count_prefix(prefix, 0, stats)
+        total += count
+        if progress is not None :
+            progress.shard(count)
+    return total
+
+def iter_solutions(dim: int, queens=None, *, engine='bitboard', multi=False, limit=None, depth=None,
+                   pool=None, scheduler='static', cache=None, stats=None, progress=None) :
+    """ Lazily yields solutions for given dimension and initial arrangement as tuples of rows.
+
+    The input is validated with input_check and left unchanged. 'limit' stops
+    the search after that many solutions, 'multi' spreads it between processes
+    of the 'pool' (a temporary one by default), splitting it 'depth' columns deep.
+    Limited parallel searches yield solutions in order of finding and stop
+    all workers once enough of them are found, so do limited searches with engines of UNORDERED.
+    The 'steal' scheduler runs its own bitboard workers and yields in no particular order.
+    Solutions are taken from the ResultCache given as 'cache' if it has them,
+    otherwise they are stored there once the search runs to the end,
+    only their number if they would not fit into it uncompressed.
+    The cache is not used with PARTIAL engines, which do not list every solution
+    and do not split the search, so they cannot be run with 'multi' or 'progress' either.
+    Given 'stats' the search always runs and is counted there, also in worker processes.
+    Given 'progress' the search is split into prefixes even in this process,
+    finished ones, solutions and visited nodes are counted there. """
+    queens = [None] * dim if queens is None else list(queens)
+    input_check(dim, queens)
+    if (stats is not None or progress is not None) and multi and scheduler == 'steal' :
+        raise ValueError("Search statistics and progress are not collected by the 'steal' scheduler")
+    if engine in PARTIAL and (multi or progress is not None) :
+        raise ValueError(f"{engine} engine does not split the search, it cannot be combined with multi or progress")
+    if limit is not None and limit <= 0 :
+        return
+    if engine in PARTIAL :
+        cache = None
+    cached = cache.solutions(queens) if cache is not None and stats is None else None
+    recording = cache is not None and cached is None
+    record = [] if recording else None
+    room = cache.room(dim) if recording else None
+    if progress is not None :
+        if stats is None :
+            stats = Nodes()
+        progress.stats = stats
+    if cached is not None :
+        solutions = (solution for solution in cached)
+    elif multi and scheduler == 'steal' :
+        solutions = steal_solutions(queens, depth, workers(pool))
+    elif multi :
+        solutions = multi_solutions(queens, engine, depth, pool, limit, stats, progress)
+    elif progress is not None :
+        solutions = sharded_solutions(queens, engine, depth, stats, progress, limit)
+    else :
+        solutions = lister(engine, limit)(queens, 0, None, stats)
+    found = 0
+    try :
+        with closing(solutions) :
+            for found, solution in enumerate(solutions, start=1) :
+                if record is not None :
+                    record.append(solution)
+                    if found > room :
+                        record = None
+                if progress is not None :
+                    progress.solutions += 1
+                yield solution
+                if found == limit :
+                    return
+    finally :
+        if stats is not None :
+            stats.pause()
+    if recording :
+        cache.store(queens, found, record)
+
+def count_solutions(dim: int, queens=None, *, multi=False, symmetry=False, depth=None, pool=None,
+                    scheduler='static', cache=None, stats=None, progress=None, engine='bitboard') -> int :
+    """ Returns number of solutions for given dimension and initial arrangement, counted by one of COUNTERS,
+    looked up in the ResultCache given as 'cache' first, unless the search is counted in 'stats'.
+    Given 'progress' the search is split into prefixes, finished ones and visited nodes are counted there. """
+    queens = [None] * dim if queens is None else list(queens)
+    input_check(dim, queens)
+    counter(engine)
+    if (stats is not None or progress is not None) and (symmetry or multi and scheduler == 'steal') :
+        raise ValueError("Search statistics and progress are not collected with symmetry or by the 'steal' scheduler")
+    if cache is not None and stats is None and (count := cache.count(queens)) is not None :
+        return count
+    if progress is not None :
+        if stats is None :
+            stats = Nodes()
+        progress.stats = stats
+    if symmetry :
+        count = symmetric_count(queens)
+    elif multi and scheduler == 'steal' :
+        count = steal_count(queens, depth, workers(pool))
+    elif multi :
+        count = multi_count(queens, depth=depth, pool=pool, stats=stats, progress=progress, engine=engine)
+    elif progress is not None :
+        count = sharded_count(queens, depth, stats, progress, engine)
+    else :
+        count = counter(engine)(queens, stats=stats)
+    if cache is not None :
+        cache.store(queens, count)
+    return count
+
+# Symmetries of the square as (swap, flip_col, flip_row) triples:
+# a field is first transposed if 'swap' is set, then mirrored along the given axes.
+SYMMETRIES = tuple((swap, flip_col, flip_row) for swap in (False, True)
+                   for flip_col in (False, True) for flip_row in (False, True))
+
+def symmetric(sym: tuple, dim: int, col: int, row: int) -> tuple :
+    """ Maps field (col, row), counted from 0, with given symmetry of the square. """
+    swap, flip_col, flip_row = sym
+    if swap :
+        col, row = row, col
+    if flip_col :
+        col = dim - 1 - col
+    if flip_row :
+        row = dim - 1 - row
+    return col, row
+
+def inverse(sym: tuple) -> tuple :
+    """ Returns symmetry that undoes given one. """
+    swap, flip_col, flip_row = sym
+    return (swap, flip_row, flip_col) if swap else sym
+
+def transform(queens: list, sym: tuple) -> list :
+    """ Returns queens arrangement mapped with given symmetry of the square. """
+    dim = len(queens)
+    result = [None] * dim
+    for c, q in enumerate(queens) :
+        if q :
+            col, row = symmetric(sym, dim, c, q - 1)
+            result[col] = row + 1
+    return result
+
+def stabilizer(queens: list) -> list :
+    """ Returns symmetries that leave given queens in place. """
+    return [sym for sym in SYMMETRIES if transform(queens, sym) == queens]
+
+def orbit(queens: list, group: list) -> list :
+    """ Returns sorted, distinct images of the queens under symmetries from the group. """
+    return sorted({tuple(transform(queens, sym)) for sym in group})
+
+def edge_search(dim: int, report) -> None :
+    """ Calls report(solution, size) once for every class of solutions of an empty board,
+    'size' being the number of distinct solutions in the class.
+
+    Each class is searched from the image whose queen in the first column is
+    closest to a corner among the queens on the edges of the board. With the
+    queen in the corner every class has eight members and the image is taken
+    whose queen in the second column is closer to the corner than the one in
+    the second row. Otherwise queens on the edges closer to a corner are forbidden:
+    the first and last rows before column 'near' and after column 'far' and
+    rows 'near' steps from the corners in the last column. The remaining ties
+    are broken by comparing the solution with its rotations, which also tells
+    solutions that are kept in place by a rotation. Both diagonals are tracked
+    as bitmasks shifted towards the next column. """
+    last = dim - 1
+    full = (1 << dim) - 1
+    top = 1 << last
+    side = top | 1
+    board = [0] * dim
+
+    def leaf(size) :
+        report(tuple(bit.bit_length() for bit in board), size)
+
+    def corner(c, left, down, right) :
+        free = full & ~(left | down | right)
+        if c < near :
+            free &= ~2
+        while free :
+            bit = free & -free
+            free ^= bit
+            board[c] = bit
+            if c + 1 < last :
+                corner(c + 1, (left | bit) << 1, down | bit, (right | bit) >> 1)
+            elif rest := full & ~((left | bit) << 1 | down | bit | (right | bit) >> 1) :
+                board[last] = rest
+                leaf(8)
+
+    def rotated() -> int :
+        """ Returns number of distinct images of the board if it is not greater
+        than any of its rotations, 0 otherwise. """
+        if board[far] == 1 :
+            own, ptn = 1, 2
+            while own <= last :
+                bit, you = 1, last
+                while board[you] != ptn and board[own] >= bit :
+                    bit <<= 1
+                    you -= 1
+                if board[own] > bit :
+                    return 0
+                if board[own] < bit :
+                    break
+                own += 1
+                ptn <<= 1
+            else :
+                return 2
+        if board[last] == end :
+            own, you = 1, last - 1
+            while own <= last :
+                bit, ptn = 1, top
+                while ptn != board[you] and board[own] >= bit :
+                    bit <<= 1
+                    ptn >>= 1
+                if board[own] > bit :
+                    return 0
+                if board[own] < bit :
+                    break
+                own += 1
+                you -= 1
+            else :
+                return 4
+        if board[near] == top :
+            own, ptn = 1, top >> 1
+            while own <= last :
+                bit, you = 1, 0
+                while board[you] != ptn and board[own] >= bit :
+                    bit <<= 1
+                    you += 1
+                if board[own] > bit :
+                    return 0
+                if board[own] < bit :
+                    break
+                own += 1
+                ptn >>= 1
+        return 8
+
+    def edge(c, left, down, right) :
+        free = full & ~(left | down | right)
+        if c < near :
+            free &= ~side
+        elif c == far :
+            if not down & side :
+                return
+            if down & side != side :
+                free &= side
+        while free :
+            bit = free & -free
+            free ^= bit
+            board[c] = bit
+            if c + 1 < last :
+                edge(c + 1, (left | bit) << 1, down | bit, (right | bit) >> 1)
+            elif (rest := full & ~((left | bit) << 1 | down | bit | (right | bit) >> 1)) and not rest & ends :
+                board[last] = rest
+                if size := rotated() :
+                    leaf(size)
+
+    board[0] = 1
+    for near in range(2, last) :
+        board[1] = bit = 1 << near
+        corner(2, (2 | bit) << 1, 1 | bit, bit >> 1)
+    ends, end = side, top >> 1
+    near, far = 1, last - 1
+    while near < far :
+        board[0] = bit = 1 << near
+        edge(1, bit << 1, bit, bit >> 1)
+        ends |= ends >> 1 | ends << 1
+        end >>= 1
+        near += 1
+        far -= 1
+
+def symmetric_search(queens: list, report) -> None :
+    """ Calls report(solution, size) once for every class of solutions equivalent under
+    symmetries that keep the initial queens in place, 'size' being the number of
+    distinct solutions in the class. Empty boards are left to edge_search().
+
+    Only the lexicographically smallest solution of each class is searched for.
+    While an image of it agrees on all columns up to the current one, it cannot
+    have a smaller row in that column, so fields that would give one are
+    forbidden for the rest of the search. """
+    dim = len(queens)
+    if dim > 4 and not any(queens) :
+        edge_search(dim, report)
+        return
+    full = (1 << dim) - 1
+    group = stabilizer(queens)
+    empty = [c for c, q in enumerate(queens) if q is None]
+    def restrict(c, row, forbidden, tied) -> tuple :
+        """ Forbids fields mapped below the queen in column c, returns None if one is taken. """
+        forbidden = list(forbidden)
+        for sym in tied :
+            for below in range(row) :
+                col, r = symmetric(sym, dim, c, below)
+                if queens[col] == r + 1 :
+                    return None, None
+                forbidden[col] |= 1 << r
+        still = []
+        for sym in tied :
+            col, r = symmetric(sym, dim, c, row)
+            if queens[col] == r + 1 :
+                still.append(sym)
+        return forbidden, still
+
+    def place(i, rows, up, down, forbidden, tied) :
+        if i == len(empty) :
+            solutions = orbit(queens, group)
+            if solutions[0] == tuple(queens) :
+                report(solutions[0], len(solutions))
+            return
+        c = empty[i]
+        free = ~(rows | (up >> (dim - 1 - c)) | (down >> c) | forbidden[c]) & full
+        while free :
+            bit = free & -free
+            free ^= bit
+            queens[c] = bit.bit_length()
+            if tied :
+                narrowed, still = restrict(c, queens[c] - 1, forbidden, tied)
+                if narrowed is None :
+                    continue
+            else :
+                narrowed, still = forbidden, tied
+            place(i + 1, rows | bit, up | (bit << (dim - 1 - c)), down | (bit << c), narrowed, still)
+        queens[c] = None
+
+    tied = [inverse(sym) for sym in group if sym != SYMMETRIES[0]]
+    place(0, *masks(queens), [0] * dim, tied)
+
+def symmetric_count(queens: list) -> int :
+    """ Counts solutions searching only one of each class of symmetric solutions. """
+    total = 0
+
+    def report(solution, size) :
+        nonlocal total
+        total += size
+
+    symmetric_search(queens, report)
+    return total
+
+def symmetric_solve(queens: list, write=None) -> None :
+    """ Prints solutions class by class, each one expanded from its representative.
+    Solutions are passed to 'write' instead if it is given. """
+    group = stabilizer(queens)
+
+    def report(representative, size) :
+        for solution in orbit(representative, group) :
+            if write :
+                write(solution)
+            else :
+                print(list(solution))
+
+    symmetric_search(queens, report)
+
+# Binary solution file header: magic, version, bytes per row, dimension, number of solutions.
+HEADER = struct.Struct('<4sHxBQQ')
+MAGIC = b'NQSF'
+VERSION = 1
+FORMATS = ('text', 'binary')
+
+def typecode(dim: int) -> str :
+    """ Returns array type code of the smallest unsigned integer that fits rows of the board. """
+    return 'B' if dim < 1 << 8 else 'H' if dim < 1 << 16 else 'I'
+
+class SolutionWriter :
+    """ Writes solutions to a binary file as fixed-width records of rows.
+
+    Each record holds 'dim' little-endian unsigned integers, a header in
+    front of them gives the dimension and number of records. The header is
+    written when the file is empty, otherwise records are appended to it.
+    The count is filled in by close(), which leaves the file itself open. """
+
+    def __init__(self, file, dim: int) :
+        self.file = file
+        self.dim = dim
+        self.code = typecode(dim)
+        self.written = 0
+        if file.tell() == 0 :
+            file.write(HEADER.pack(MAGIC, VERSION, array(self.code).itemsize, dim, 0))
+
+    def __enter__(self) :
+        return self
+
+    def __exit__(self, *exc) -> None :
+        self.close()
+
+    def write(self, solution) -> None :
+        """ Appends one solution. """
+        rows = array(self.code, solution)
+        if sys.byteorder == 'big' :
+            rows.byteswap()
+        self.file.write(rows.tobytes())
+        self.written += 1
+
+    def close(self) -> None :
+        """ Stores number of records in the header. """
+        end = self.file.tell()
+        record = self.dim * array(self.code).itemsize
+        count = (end - HEADER.size) // record if record else self.written
+        self.file.seek(HEADER.size - 8)
+        self.file.write(struct.pack('<Q', count))
+        self.file.seek(end)
+
+class SolutionFile :
+    """ Memory-mapped binary solution file, solution k is read without loading the others.
+
+    If the header does not agree with the file size, as after an interrupted
+    run, the number of solutions is taken from the size. """
+
+    def __init__(self, path: str) :
+        with open(path, 'rb') as file :
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, itemsize, self.dim, count = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION :
+            raise ValueError(f"{path} is not a binary solution file")
+        self.code = typecode(self.dim)
+        self.record = self.dim * itemsize
+        if self.record :
+            stored = (len(self.map) - HEADER.size) // self.record
+            self.count = count if count == stored else stored
+        else :
+            self.count = count
+
+    def __enter__(self) :
+        return self
+
+    def __exit__(self, *exc) -> None :
+        self.close()
+
+    def __len__(self) -> int :
+        return self.count
+
+    def __getitem__(self, k: int) -> tuple :
+        if k < 0 :
+            k += self.count
+        if not 0 <= k < self.count :
+            raise IndexError("Solution index out of range")
+        start = HEADER.size + k * self.record
+        rows = array(self.code, self.map[start:start + self.record])
+        if sys.byteorder == 'big' :
+            rows.byteswap()
+        return tuple(rows)
+
+    def __iter__(self) :
+        for k in range(self.count) :
+            yield self[k]
+
+    def close(self) -> None :
+        """ Unmaps the file. """
+        self.map.close()
+
+# Minimal number of seconds between two writes of a checkpoint file.
+CHECKPOINT_INTERVAL = 5.0
+
+class Checkpoint :
+    """ Record of finished shards of a long run, kept in a JSON file.
+
+    'done' maps indexes of finished shards to their numbers of solutions,
+    'offset' is the size of the output file written for them. The file is
+    replaced atomically and at most every CHECKPOINT_INTERVAL seconds. """
+
+    def __init__(self, path: str, params: dict, resume=False) :
+        self.path = path
+        self.params = params
+        self.output = None
+        self.done = {}
+        self.offset = 0
+        self.saved = time.monotonic()
+        if resume and os.path.exists(path) :
+            with open(path) as file :
+                data = json.load(file)
+            if data['params'] != params :
+                raise ValueError(f"Checkpoint {path} was made for a different run")
+            self.done = {int(index): count for index, count in data['done'].items()}
+            self.offset = data['offset']
+
+    @staticmethod
+    def depth(path: str, queens: list, resume=False, depth=None, pool=None) -> int :
+        """ Returns split depth of the run, the one recorded in the checkpoint when resuming. """
+        if depth is not None :
+            return depth
+        if resume and os.path.exists(path) :
+            with open(path) as file :
+                return json.load(file)['params']['depth']
+        prefixes = shards(queens, None, workers(pool))
+        return queens.count(None) - (prefixes[0].count(None) if prefixes else 0)
+
+    def finish(self, index: int, count: int, offset=0) -> None :
+        """ Marks shard as finished, saves the checkpoint if the last save is old enough. """
+        self.done[index] = count
+        self.offset = offset
+        if time.monotonic() - self.saved >= CHECKPOINT_INTERVAL :
+            self.save()
+
+    def save(self) -> None :
+        """ Writes the checkpoint to a temporary file and moves it in place. """
+        if self.output :
+            self.output.flush()
+            os.fsync(self.output.fileno())
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w') as file :
+            json.dump({'params': self.params, 'done': self.done, 'offset': self.offset}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+        self.saved = time.monotonic()
+
+def checkpointed_count(queens: list, path: str, resume=False, depth=None, multi=False, pool=None) -> int :
+    """ Counts solutions shard by shard, finished shards are recorded in the checkpoint
+    and skipped when resuming. """
+    depth = Checkpoint.depth(path, queens, resume, depth, pool)
+    checkpoint = Checkpoint(path, {'mode': 'count', 'queens': queens, 'depth': depth}, resume)
+    prefixes = split(queens, depth)
+    todo = [index for index in range(len(prefixes)) if index not in checkpoint.done]
+    try :
+        if multi :
+            with executor(pool) as ex :
+                futures = {ex.submit(bitboard_count, prefixes[index]): index for index in todo}
+                for future in as_completed(futures) :
+                    checkpoint.finish(futures[future], future.result())
+        else :
+            for index in todo :
+                checkpoint.finish(index, bitboard_count(prefixes[index]))
+    finally :
+        checkpoint.save()
+    return sum(checkpoint.done.values())
+
+def checkpointed_solve(queens: list, path: str, output: str, resume=False, engine='bitboard', depth=None,
+                       multi=False, pool=None, fmt='text') -> int :
+    """ Writes solutions to the output file shard by shard, in search order.
+
+    The checkpoint records the finished shards with the size of the output
+    written for them. When resuming, whatever was written after that is cut
+    off and the search carries on with the next shard. 'fmt' is 'text' for
+    one list per line or 'binary' for SolutionWriter records. Returns number of solutions. """
+    depth = Checkpoint.depth(path, queens, resume, depth, pool)
+    checkpoint = Checkpoint(path, {'mode': 'solve', 'queens': queens, 'depth': depth, 'format': fmt}, resume)
+    prefixes = split(queens, depth)
+    start = len(checkpoint.done)
+    with open(output, 'r+b' if start else 'wb') as out :
+        out.truncate(checkpoint.offset)
+        out.seek(checkpoint.offset)
+        checkpoint.output = out
+        writer = SolutionWriter(out, len(queens)) if fmt == 'binary' else None
+        try :
+            with executor(pool) if multi else nullcontext() as ex :
+                rest = prefixes[start:]
+                if multi :
+                    batches = ex.map(collect, [engine] * len(rest), rest)
+                else :
+                    batches = (list(ENGINES[engine](prefix)) for prefix in rest)
+                for index, batch in enumerate(batches, start=start) :
+                    for solution in batch :
+                        if writer :
+                            writer.write(solution)
+                        else :
+                            out.write(f'{list(solution)}\n'.encode())
+                    checkpoint.finish(index, len(batch), out.tell())
+        finally :
+            if writer :
+                writer.close()
+            checkpoint.save()
+    return sum(checkpoint.done.values())
+
+# Default location and size limit in bytes of the result cache.
+CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'chessboard', 'results.sqlite3')
+CACHE_LIMIT = 256 * 1024 * 1024
+
+class ResultCache :
+    """ Persistent cache of counts and solutions in an SQLite database.
+
+    Entries are keyed by the smallest image of the initial arrangement under
+    symmetries of the square, so symmetric arrangements share one entry and
+    solutions are mapped back on the way out. Every hit refreshes the entry,
+    the least recently used ones are evicted when the total size of entries
+    exceeds 'limit'. SQLite locking makes it safe to share between processes. """
+
+    def __init__(self, path=CACHE_PATH, limit=CACHE_LIMIT) :
+        if os.path.dirname(path) :
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.limit = limit
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS results (
+                               key TEXT PRIMARY KEY, count INTEGER NOT NULL, solutions BLOB,
+                               size INTEGER NOT NULL, used REAL NOT NULL)""")
+
+    def close(self) -> None :
+        """ Closes the database connection. """
+        self.db.close()
+
+    @staticmethod
+    def key(queens: list) -> tuple :
+        """ Returns cache key of the arrangement and symmetry that maps it onto the key. """
+        image, sym = min((tuple(q or 0 for q in transform(queens, sym)), sym) for sym in SYMMETRIES)
+        return f"{len(queens)}:{','.join(map(str, image))}", sym
+
+    def lookup(self, key: str, column: str) :
+        """ Returns value from given column of the entry and marks it as recently used. """
+        row = self.db.execute(f"SELECT {column} FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] is None :
+            return None
+        self.db.execute("UPDATE results SET used = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def count(self, queens: list) -> int | None :
+        """ Returns cached number of solutions, None if it is not known. """
+        return self.lookup(self.key(queens)[0], 'count')
+
+    def solutions(self, queens: list) -> list | None :
+        """ Returns cached solutions in search order, None if they are not stored. """
+        key, sym = self.key(queens)
+        blob = self.lookup(key, 'solutions')
+        if blob is None :
+            return None
+        dim = len(queens)
+        if not dim :
+            return [()]
+        rows = array('I', zlib.decompress(blob))
+        back = inverse(sym)
+        return sorted(tuple(transform(list(rows[i:i + dim]), back)) for i in range(0, len(rows), dim))
+
+    def room(self, dim: int) -> int :
+        """ Returns number of solutions of given dimension whose uncompressed rows fit within 'limit'. """
+        return self.limit // (array('I').itemsize * max(dim, 1))
+
+    def store(self, queens: list, count: int, solutions=None) -> None :
+        """ Saves number of solutions, and the solutions themselves if given
+        and they fit within 'limit' once compressed. """
+        key, sym = self.key(queens)
+        blob = None
+        if solutions is not None :
+            rows = array('I')
+            for solution in solutions :
+                rows.extend(transform(list(solution), sym))
+            blob = zlib.compress(rows.tobytes())
+        size = len(key) + len(blob or b'') + 64
+        if size > self.limit :
+            blob = None
+            size = len(key) + 64
+        if size > self.limit :
+            return
+        self.db.execute("BEGIN IMMEDIATE")
+        try :
+            self.db.execute("""INSERT INTO results VALUES (?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET
+                                   count = excluded.count, used = excluded.used,
+                                   solutions = coalesce(excluded.solutions, solutions),
+                                   size = max(excluded.size, size)""",
+                            (key, count, blob, size, time.time()))
+            total = self.db.execute("SELECT coalesce(sum(size), 0) FROM results").fetchone()[0]
+            for old, old_size in self.db.execute("SELECT key, size FROM results ORDER BY used").fetchall() :
+                if total <= self.limit :
+                    break
+                self.db.execute("DELETE FROM results WHERE key = ?", (old,))
+                total -= old_size
+            self.db.execute("COMMIT")
+        except BaseException :
+            self.db.execute("ROLLBACK")
+            raise
+
+def depth(x) -> int :
+    """ Turns input into split depth or throws an error. """
+    if (n := int(x)) >= 0 :
+        return n
+    raise ValueError("Split depth must be a non-negative integer!")
+
+def limit(x) -> int :
+    """ Turns input into limit of solutions or throws an error. """
+    if (n := int(x)) >= 0 :
+        return n
+    raise ValueError("Limit must be a non-negative integer!")
 
 def dimension(x) -> int :
     """ Turns input into proper dimension or throws an error. """
@@ -82,9 +1879,104 @@ if __name__ == '__main__' :
                         help="""Initial arrangement of queens on the chessboard: c1 c2 ... cn,
                         where cn is row number in n'th column. For empty column use N or 0.""")
     parser.add_argument('-m', '--multi', action='store_true', help='Toggle multiprocessing.')
+    parser.add_argument('-e', '--engine', choices=ENGINES, default='basic',
+                        help="""Search algorithm, 'bitboard' tracks rows and diagonals as bitmasks,
+                        'iterative' does the same with an explicit stack instead of recursion,
+                        'construct' builds a single solution of an empty board of any size in linear time,
+                        'local' looks for a single solution with min-conflicts local search,
+                        'mrv' fills the most constrained column first and sorts solutions afterwards
+                        unless --limit is given,
+                        'arc' does the same keeping domains of all columns arc consistent,
+                        meant for completing boards with many queens placed.""")
+    parser.add_argument('--budget', type=float, default=LOCAL_BUDGET,
+                        help='Seconds the local search may take before it gives up.')
+    parser.add_argument('--restarts', type=limit, default=None,
+                        help='Number of times the local search may start over, unlimited by default.')
+    parser.add_argument('-c', '--count', action='store_true',
+                        help='Print only the number of solutions (uses bitboard engine unless mrv or arc is chosen).')
+    parser.add_argument('-s', '--symmetry', action='store_true',
+                        help='Search only one solution of each class equivalent under symmetries of the board.')
+    parser.add_argument('-k', '--split-depth', type=depth, default=None,
+                        help="""Number of empty columns filled before work is handed to processes,
+                        chosen from the number of cores by default.""")
+    parser.add_argument('--scheduler', choices=SCHEDULERS, default='static',
+                        help="""Multiprocess scheduler, 'steal' lets idle workers take over
+                        part of the busy ones' work (bitboard engine, unordered output).""")
+    parser.add_argument('-l', '--limit', type=limit, default=None,
+                        help='Stop after that many solutions, with --multi take the ones found first.')
+    parser.add_argument('-o', '--output', help='Write solutions to a file instead of standard output.')
+    parser.add_argument('-f', '--format', choices=FORMATS, default='text',
+                        help="Output format, 'binary' writes fixed-width records and requires --output.")
+    parser.add_argument('--checkpoint', metavar='FILE',
+                        help='Record finished shards of the search in FILE, so the run can be resumed.')
+    parser.add_argument('--resume', action='store_true',
+                        help='Skip shards recorded as finished in the checkpoint file.')
+    parser.add_argument('--cache', metavar='FILE', nargs='?', const=CACHE_PATH,
+                        help=f'Look results up in and save them to a cache database, {CACHE_PATH} by default.')
+    parser.add_argument('--stats', metavar='FILE', nargs='?', const='-',
+                        help="""Count visited nodes, rejected rows, solutions and time per depth of the search,
+                        print them to standard error or save them as JSON to FILE.""")
+    parser.add_argument('--progress', metavar='FD', nargs='?', type=int, const=2,
+                        help=f"""Write progress of the search as lines of JSON to file descriptor FD,
+                        standard error by default, at most every {PROGRESS_INTERVAL} seconds.""")
     args = parser.parse_args()
+    if args.symmetry and args.multi :
+        parser.error("--symmetry cannot be combined with --multi")
+    if args.resume and not args.checkpoint :
+        parser.error("--resume requires --checkpoint")
+    if args.checkpoint and (args.symmetry or args.scheduler == 'steal') :
+        parser.error("--checkpoint works only with the static scheduler and without --symmetry")
+    if args.checkpoint and not args.count and not args.output :
+        parser.error("--checkpoint requires --output when solutions are listed")
+    if args.limit is not None and (args.count or args.symmetry or args.checkpoint) :
+        parser.error("--limit cannot be combined with --count, --symmetry or --checkpoint")
+    if args.engine in PARTIAL and (args.multi or args.count or args.symmetry or args.checkpoint or args.cache) :
+        parser.error(f"{args.engine} engine cannot be combined with --multi, --count, --symmetry, --checkpoint or --cache")
+    if args.format == 'binary' and not args.output :
+        parser.error("--format binary requires --output")
+    if (args.stats or args.progress is not None) and (args.symmetry or args.checkpoint
+            or args.multi and args.scheduler == 'steal' or not args.count and args.engine in PARTIAL) :
+        parser.error("--stats and --progress cannot be combined with --symmetry, --checkpoint, "
+                     "the steal scheduler or the construct and local engines")
 
     if input_check(args.dim, args.queens) :
-        solve = multi_solve if args.multi else basic_solve
-        with Timer(logger=lambda x: print(x, file=sys.stderr)):
-            solve( args.queens )
+        cache = ResultCache(args.cache) if args.cache else None
+        stats = Stats() if args.stats else None
+        progress = None if args.progress is None else \
+            Progress(sys.stderr if args.progress == 2 else os.fdopen(args.progress, 'w', closefd=False))
+        with Timer(logger=lambda x: print(x, file=sys.stderr)), progress or nullcontext():
+            if args.checkpoint and args.count :
+                print( checkpointed_count(args.queens, args.checkpoint, args.resume, args.split_depth,
+                                          args.multi) )
+            elif args.checkpoint :
+                checkpointed_solve(args.queens, args.checkpoint, args.output, args.resume, args.engine,
+                                   args.split_depth, args.multi, fmt=args.format)
+            elif args.count :
+                print( count_solutions(args.dim, args.queens, multi=args.multi, symmetry=args.symmetry,
+                                      depth=args.split_depth, scheduler=args.scheduler, cache=cache,
+                                      stats=stats, progress=progress,
+                                      engine=args.engine if args.engine in COUNTERS else 'bitboard') )
+            else :
+                binary = args.format == 'binary'
+                with open(args.output, 'wb' if binary else 'w') if args.output else nullcontext(sys.stdout) as out, \
+                        SolutionWriter(out, args.dim) if binary else nullcontext() as writer :
+                    write = writer.write if binary else \
+                        lambda solution: print(f"[{', '.join(map(str, solution))}]", file=out)
+                    if args.symmetry :
+                        symmetric_solve(args.queens, write)
+                    elif args.engine == 'local' :
+                        if (solution := min_conflicts(args.queens, args.budget, args.restarts)) is not None :
+                            write(solution)
+                        else :
+                            print("Local search gave up without finding a solution", file=sys.stderr)
+                    else :
+                        for solution in iter_solutions(args.dim, args.queens, engine=args.engine,
+                                                       multi=args.multi, depth=args.split_depth,
+                                                       scheduler=args.scheduler, cache=cache,
+                                                       limit=args.limit, stats=stats, progress=progress) :
+                            write(solution)
+        if args.stats == '-' :
+            print(stats, file=sys.stderr)
+        elif args.stats :
+            with open(args.stats, 'w') as f :
+                json.dump(stats.as_dict(), f, indent=2)
@@ -0,0 +1,75 @@
+"""Regression checks of the N-queens solver"""
+
+import pytest
+
+import solver
+
+@pytest.mark.parametrize('dim', range(1, 8))
+def test_steal_small_boards(dim):
+    """ Small boards are split into full arrangements, which workers must count and list too. """
+    queens = [None] * dim
+    assert solver.steal_count(queens, workers=4) == solver.bitboard_count(queens)
+    assert sorted(solver.steal_solutions(queens, workers=4)) == list(solver.bitboard_solutions(queens))
+
+@pytest.mark.parametrize('queens', [[2, 4, 1, 3], [1, 5, 2, 6, 3, 7, 4]])
+def test_steal_full_board(queens):
+    assert solver.steal_count(queens, workers=2) == 1
+    assert list(solver.steal_solutions(queens, workers=2)) == [tuple(queens)]
+
+# Partially pinned boards, with initial queens kept in place by all, some or no symmetries,
+# a full solution and an arrangement with queens attacking each other.
+PINNED = [
+    [2, None, None, None, None],
+    [None, None, 4, None, None, None, None],
+    [1, None, None, None, None, None, None, None],
+    [None, 1, None, None, None, None, None, None],
+    [None, None, None, None, None, 4, None, 1],
+    [2, 4, 1, 3],
+    [1, 2, None, None, None],
+]
+BOARDS = [[None] * dim for dim in range(1, 9)] + PINNED
+
+@pytest.mark.parametrize('queens', BOARDS)
+def test_propagate_keeps_solutions(queens):
+    """ Narrowed domains and queens placed by propagation must agree with every solution. """
+    dim = len(queens)
+    solutions = list(solver.bitboard_solutions(list(queens)))
+    narrowed = list(queens)
+    domains = {c: (1 << dim) - 1 for c, q in enumerate(queens) if q is None}
+    if solver.propagate(narrowed, domains, *solver.masks(queens)) is None:
+        assert not solutions
+        return
+    for solution in solutions:
+        assert all(q is None or q == row for q, row in zip(narrowed, solution))
+        assert all(domains[c] >> (solution[c] - 1) & 1 for c in domains)
+
+@pytest.mark.parametrize('queens', BOARDS)
+def test_arc(queens):
+    assert solver.arc_count(list(queens)) == solver.bitboard_count(list(queens))
+    assert list(solver.arc_solutions(list(queens))) == list(solver.bitboard_solutions(list(queens)))
+
+@pytest.mark.parametrize('queens', BOARDS)
+def test_mrv(queens):
+    assert solver.mrv_count(list(queens)) == solver.bitboard_count(list(queens))
+    assert list(solver.mrv_solutions(list(queens))) == list(solver.bitboard_solutions(list(queens)))
+
+@pytest.mark.parametrize('queens', BOARDS + [[None] * dim for dim in range(9, 11)])
+def test_symmetric(queens):
+    """ Classes of symmetric solutions, expanded and counted, must give back every solution once. """
+    solutions = []
+    solver.symmetric_solve(list(queens), solutions.append)
+    assert solver.symmetric_count(list(queens)) == solver.bitboard_count(list(queens))
+    assert sorted(solutions) == list(solver.bitboard_solutions(list(queens)))
+
+@pytest.mark.parametrize('queens', PINNED)
+def test_cache_symmetry(tmp_path, queens):
+    """ Results stored for one arrangement are mapped onto each of its symmetric images. """
+    cache = solver.ResultCache(str(tmp_path / 'results.sqlite3'))
+    try:
+        cache.store(queens, solver.bitboard_count(list(queens)), solver.bitboard_solutions(list(queens)))
+        for sym in solver.SYMMETRIES:
+            image = solver.transform(queens, sym)
+            assert cache.count(image) == solver.bitboard_count(list(image))
+            assert cache.solutions(image) == list(solver.bitboard_solutions(list(image)))
+    finally:
+        cache.close()